@@ -1,59 +1,79 @@
+import os
 import threading
 import cv2
-import base64
 import time
 import json
-import smbus
-import pandas as pd
-import numpy as np
-import joblib
-from datetime import datetime
-from scipy.fft import fft
-
-from mqtt.mqtt_config import connect_mqtt
-from mqtt.mqtt_live_feed import publish_feed, publish_alert
-from mqtt.mqtt_gesture import publish_gesture_alert
-from mqtt.mqtt_config import MQTT_FACE_ALERT_TOPIC, MQTT_OBJECT_ALERT_TOPIC, MQTT_GESTURE_ALERT_TOPIC
+
+from mqtt.mqtt_publisher import get_publisher
+from mqtt.alert_engine import get_alert_engine
+from mqtt.feed_publisher import FeedPublisher
+from mqtt.stream_controller import AdaptiveStreamController
+from mqtt.mqtt_config import MQTT_FACE_ALERT_TOPIC, MQTT_OBJECT_ALERT_TOPIC, MQTT_GESTURE_ALERT_TOPIC, \
+    MQTT_METRICS_TOPIC, MQTT_PROFILE_CONTROL_TOPIC, MQTT_PROFILE_RESULT_TOPIC
 
 from devices.camera_feed import facial_recognition as fr
 from devices.camera_feed import object_detection as od
 from devices.gesturerecognition import gesture as gesture
 from devices.audio_recognition.voice_auth import voice_loop
+from pipeline.frame_bus import FrameBus
+from pipeline.stages import StagePipeline
+from telemetry.metrics import metrics, MetricsReporter
+from telemetry.profiler import SamplingProfiler, handle_profile_request
 
 fr.load_face_data()
-fr.setup_mqtt()
 
 # ---------- Video Stream Class ----------
 class VideoStream:
-    def __init__(self, src=0, width=640, height=480):
+    def __init__(self, src=0, width=640, height=480, slots=4):
         self.cap = cv2.VideoCapture(src)
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
         self.cap.set(cv2.CAP_PROP_FPS, 30)
-        self.ret, self.frame = self.cap.read()
-        self.running = True
-        threading.Thread(target=self.update, daemon=True).start()
+        self.ret, frame = self.cap.read()
+        self.bus = None
+        self.running = self.ret
+        if self.ret:
+            self.bus = FrameBus(frame.shape, frame.dtype, slots=slots)
+            self.bus.publish(frame)
+            threading.Thread(target=self.update, daemon=True).start()
 
     def update(self):
         while self.running:
-            self.ret, self.frame = self.cap.read()
+            buffer = self.bus.next_buffer()
+            with metrics.timed("capture"):
+                ret, frame = self.cap.read(buffer)
+            if not ret:
+                time.sleep(0.01)  # Avoid spinning while the camera has nothing for us
+                continue
+            if frame is buffer:
+                self.bus.commit()
+            else:
+                # Capture size changed under us; copy into the ring instead
+                self.bus.publish(cv2.resize(frame, (self.bus.shape[1], self.bus.shape[0])))
 
     def read(self):
-        return self.ret, self.frame
+        packet = self.bus.latest() if self.bus is not None else None
+        if packet is None:
+            return False, None
+        return True, packet.frame
+
+    def wait_newer(self, last_seq, timeout=None, copy=True):
+        return self.bus.wait_newer(last_seq, timeout=timeout, copy=copy)
 
     def stop(self):
         self.running = False
+        if self.bus is not None:
+            self.bus.close()
         self.cap.release()
 
-# ---------- Async MQTT Publishing ----------
-def async_publish(jpg_text):
-    threading.Thread(target=publish_feed, args=(mqtt_client, jpg_text), daemon=True).start()
-
 # ---------- MQTT Setup ----------
-mqtt_client = connect_mqtt()
-mqtt_thread = threading.Thread(target=mqtt_client.loop_forever)
-mqtt_thread.daemon = True
-mqtt_thread.start()
+# One shared connection and outbound queue for every publisher in the process
+mqtt_client = get_publisher()
+
+# ---------- Live Feed Publishing ----------
+FEED_MODE = "binary"  # "json" for dashboards that only understand the base64 payload
+feed_publisher = FeedPublisher(mqtt_client, mode=FEED_MODE, size=(320, 240), quality=70)
+stream_controller = AdaptiveStreamController(min_fps=1, max_fps=10, min_quality=35, max_quality=80)
 
 # ---------- Webcam Setup ----------
 video_stream = VideoStream()
@@ -61,16 +81,35 @@ if not video_stream.ret:
     print("[ERROR] Unable to access the webcam.")
     exit()
 
-# ---------- Alert Settings ----------
-alert_interval = 30  # seconds
-last_alert_time = 0
+# ---------- Alerts ----------
+# Every detector reports raw events; dedupe, rate limits and batching live in the engine
+alert_engine = get_alert_engine()
 frame_count = 0
 
-# ---------- Detection Thread ----------
-detection_lock = threading.Lock()
-latest_annotated_frame = None
-latest_face_names = []
-latest_object_alerts = []
+# ---------- Metrics ----------
+METRICS_INTERVAL = 10     # seconds between snapshots on MQTT_METRICS_TOPIC
+METRICS_HTTP_PORT = None  # e.g. 9100 to also serve the latest snapshot at /metrics
+metrics_reporter = MetricsReporter(mqtt_client, MQTT_METRICS_TOPIC, interval=METRICS_INTERVAL,
+                                   http_port=METRICS_HTTP_PORT)
+metrics_reporter.add_source("mqtt", mqtt_client.stats)
+metrics_reporter.add_source("alerts", alert_engine.stats)
+metrics_reporter.add_source("snapshots", od.snapshot_writer.stats)
+
+def feed_stats():
+    return {
+        "published": feed_publisher.published,
+        "dropped": feed_publisher.dropped,
+        "latency_ms": round(feed_publisher.latency * 1000, 1),
+        "fps_cap": round(stream_controller.fps, 2),
+        "quality": stream_controller.quality,
+    }
+
+metrics_reporter.add_source("feed", feed_stats)
+
+# ---------- Pipeline Settings ----------
+FACE_STAGE_HZ = 5      # face recognition passes per second
+OBJECT_STAGE_HZ = 2    # YOLO passes per second
+RESULT_MAX_AGE = 2.0   # seconds before a stage's overlay is considered stale
 
 # ---------- Gesture Alert Handling ----------
 def on_gesture_alert(client, userdata, message):
@@ -79,39 +118,49 @@ def on_gesture_alert(client, userdata, message):
     except Exception as e:
         print("[ERROR] Failed to handle gesture MQTT message:", e)
 
-mqtt_client.subscribe(MQTT_GESTURE_ALERT_TOPIC)
-mqtt_client.message_callback_add(MQTT_GESTURE_ALERT_TOPIC, on_gesture_alert)
-
-def detection_worker():
-    global latest_annotated_frame, latest_face_names, latest_object_alerts
-    while True:
-        ret, frame = video_stream.read()
-        if not ret:
-            continue
-
-        try:
-            annotated_frame, face_names = fr.process_frame(frame, model='small', cv_scaler=3)
-            object_annotated, object_alerts = od.detect_objects(frame)
-            composite_frame = cv2.addWeighted(object_annotated, 0.6, annotated_frame, 0.4, 0)
-
-            with detection_lock:
-                latest_annotated_frame = composite_frame.copy()
-                latest_face_names = face_names
-                latest_object_alerts = object_alerts
-
-            for msg in object_alerts:
-                try:
-                    publish_alert(mqtt_client, msg, topic=MQTT_OBJECT_ALERT_TOPIC)
-                except Exception as e:
-                    print("[ERROR] Failed to publish object alert immediately:", e)
-
-        except Exception as e:
-            print(f"[ERROR] Detection thread exception: {e}")
-            continue
-
-# Start detection in background
-detection_thread = threading.Thread(target=detection_worker, daemon=True)
-detection_thread.start()
+mqtt_client.subscribe(MQTT_GESTURE_ALERT_TOPIC, on_gesture_alert)
+
+# ---------- On-demand Profiling ----------
+# Publish to MQTT_PROFILE_CONTROL_TOPIC to sample every thread's stack; nothing runs until then
+profiler = SamplingProfiler(os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"))
+
+def on_profile_request(client, userdata, message):
+    try:
+        handle_profile_request(profiler, mqtt_client, MQTT_PROFILE_RESULT_TOPIC, message.payload)
+    except Exception as e:
+        print("[ERROR] Failed to handle profile request:", e)
+
+mqtt_client.subscribe(MQTT_PROFILE_CONTROL_TOPIC, on_profile_request)
+
+# ---------- Pipeline Stages ----------
+def face_stage(frame):
+    return fr.detect_faces(frame, model='small', cv_scaler=3, tracking=True)
+
+def object_stage(frame):
+    return od.analyze_frame(frame)
+
+def on_object_result(result):
+    _, object_alerts = result.value
+    # Keyed by track so two different objects with the same label are both reported
+    for track_id, msg in object_alerts:
+        alert_engine.report(MQTT_OBJECT_ALERT_TOPIC, msg, key=track_id)
+
+def render_frame(frame, results, now):
+    face = results.get("face")
+    if face is not None and now - face.timestamp < RESULT_MAX_AGE:
+        face_locations, face_names = face.value
+        fr.draw_results(frame, face_locations, face_names)
+    objects = results.get("object")
+    if objects is not None and now - objects.timestamp < RESULT_MAX_AGE:
+        od.draw_detections(frame, objects.value[0])
+    return frame
+
+pipeline = StagePipeline(video_stream.bus)
+pipeline.add_stage("face", face_stage, rate_hz=FACE_STAGE_HZ)
+pipeline.add_stage("object", object_stage, rate_hz=OBJECT_STAGE_HZ, on_result=on_object_result)
+pipeline.start()
+metrics_reporter.start()
+
 # Start voice authentication in background
 voice_thread = threading.Thread(target=voice_loop, daemon=True)
 voice_thread.start()
@@ -121,47 +170,42 @@ voice_thread.start()
 
 # ---------- Main Loop (MQTT Publishing) ----------
 frame_count = 0
+last_published_seq = 0
 
 while True:
     frame_count += 1
     time.sleep(0.05)  # ~20 FPS max render loop
     
-    with detection_lock:
-        display_frame = latest_annotated_frame.copy() if latest_annotated_frame is not None else None
-        face_names = latest_face_names[:]
-        object_alerts = latest_object_alerts[:]
-        
-    gesture.process_next(mqtt_client)
-
-
-    if display_frame is None:
-        continue
-
-    # Encode and publish every 5th frame
-    if frame_count % 5 == 0:
-        stream_frame = cv2.resize(display_frame, (320, 240))
-        ret2, buffer = cv2.imencode('.jpg', stream_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 70])
-        if ret2:
-            jpg_as_text = base64.b64encode(buffer).decode('utf-8')
-            async_publish(jpg_as_text)
-
-    # Publish face alerts if needed
-    current_time = time.time()
-    if (current_time - last_alert_time) > alert_interval:
-        for name in face_names:
-            try:
-                msg = "Unrecognized face detected" if name == "Unknown" else f"Recognized: {name}"
-                publish_alert(mqtt_client, msg, topic=MQTT_FACE_ALERT_TOPIC)
-            except Exception as e:
-                print("[ERROR] Failed to publish face alert:", e)
-
-        last_alert_time = current_time
-    
+    results = pipeline.latest()
+    face = results["face"]
+    face_names = face.value[1] if face is not None and time.time() - face.timestamp < RESULT_MAX_AGE else []
+
+    gesture.process_next()
+
+    # Publish the frame only when the scene changed and the link can take it
+    stream_controller.update(feed_publisher.latency, feed_publisher.outbound_depth())
+    packet = video_stream.bus.latest(copy=False)
+    if packet is not None and packet.seq != last_published_seq and stream_controller.should_publish(packet.frame):
+        last_published_seq = packet.seq
+        with metrics.timed("composite"):
+            display_frame = render_frame(packet.frame.copy(), results, time.time())
+        feed_publisher.quality = stream_controller.quality
+        feed_publisher.submit(display_frame, packet.seq, packet.timestamp)
+
+    # Report every face currently seen; repeats are collapsed by the alert engine
+    for name in face_names:
+        msg = "Unrecognized face detected" if name == "Unknown" else f"Recognized: {name}"
+        alert_engine.report(MQTT_FACE_ALERT_TOPIC, msg, key=name)
+
 
 
 
+pipeline.stop()
+metrics_reporter.stop()
+feed_publisher.stop()
+alert_engine.stop()
 video_stream.stop()
-mqtt_client.disconnect()
+mqtt_client.stop()
 
 
 
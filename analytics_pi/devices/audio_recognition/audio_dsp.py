@@ -0,0 +1,89 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.signal import butter, sosfilt, sosfilt_zi
+
+try:
+    import webrtcvad
+except ImportError:  # energy threshold is used instead
+    webrtcvad = None
+
+
+@lru_cache(maxsize=8)
+def design_bandpass(sr, lowcut=300, highcut=3400, order=5):
+    """Butterworth band-pass SOS coefficients, designed once per parameter set."""
+    nyq = 0.5 * sr
+    sos = butter(order, [lowcut / nyq, highcut / nyq], btype='band', output='sos')
+    return sos
+
+
+def bandpass_filter(data, sr, lowcut=300, highcut=3400, order=5):
+    """One-shot band-pass (zero initial state) using the cached filter design."""
+    return sosfilt(design_bandpass(sr, lowcut, highcut, order), data)
+
+
+class StreamingBandpass:
+    """Band-pass filter that carries its state across consecutive chunks."""
+
+    def __init__(self, sr, lowcut=300, highcut=3400, order=5):
+        self.sos = design_bandpass(sr, lowcut, highcut, order)
+        self.reset()
+
+    def reset(self):
+        self.zi = np.zeros_like(sosfilt_zi(self.sos))
+
+    def process(self, chunk):
+        filtered, self.zi = sosfilt(self.sos, chunk, zi=self.zi)
+        return filtered
+
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection on band-passed audio.
+
+    Uses webrtcvad on 30 ms frames and reports speech when at least
+    `min_speech_ratio` of the frames are voiced; falls back to a filtered RMS
+    energy threshold when webrtcvad is not installed. process() is the
+    streaming entry point (filter state and leftover samples carry over between
+    consecutive chunks, call reset() after a gap); detect() judges one
+    self-contained clip.
+    """
+
+    def __init__(self, sr=16000, aggressiveness=2, frame_ms=30, min_speech_ratio=0.3, energy_threshold=0.025):
+        self.sr = sr
+        self.frame_len = int(sr * frame_ms / 1000)
+        self.min_speech_ratio = min_speech_ratio
+        self.energy_threshold = energy_threshold
+        self.vad = webrtcvad.Vad(aggressiveness) if webrtcvad is not None else None
+        self.filter = StreamingBandpass(sr)
+        self.last_score = 0.0  # speech-frame ratio (webrtcvad) or RMS energy (fallback)
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def reset(self):
+        self.filter.reset()
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def process(self, chunk):
+        return self._decide(self.filter.process(chunk), stream=True)
+
+    def detect(self, audio):
+        return self._decide(bandpass_filter(audio, self.sr), stream=False)
+
+    def _decide(self, filtered, stream):
+        if self.vad is None or len(filtered) == 0:
+            self.last_score = float(np.sqrt(np.mean(np.square(filtered)))) if len(filtered) else 0.0
+            return self.last_score > self.energy_threshold
+
+        pcm = (np.clip(filtered, -1.0, 1.0) * 32767).astype(np.int16)
+        if stream:
+            pcm = np.concatenate([self._pending, pcm])
+        usable = len(pcm) - len(pcm) % self.frame_len
+        if stream:
+            self._pending = pcm[usable:]
+        frames = pcm[:usable].reshape(-1, self.frame_len)
+        if len(frames) == 0:
+            return False
+
+        voiced = sum(self.vad.is_speech(frame.tobytes(), self.sr) for frame in frames)
+        self.last_score = voiced / len(frames)
+        return self.last_score >= self.min_speech_ratio
@@ -0,0 +1,117 @@
+import time
+
+import numpy as np
+import sounddevice as sd
+
+
+class AudioRingBuffer:
+    """
+    Single-producer ring buffer of recent mono audio.
+
+    Positions are absolute sample counts since the stream started. The producer
+    (the sounddevice callback) copies samples in and only then advances
+    `written`, so readers never need a lock: a window is valid as long as it
+    lies within the last `capacity` samples.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self.written = 0
+
+    def write(self, samples):
+        n = len(samples)
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.written += n - self.capacity
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:n - first] = samples[first:]
+        self.written += n
+
+    def oldest(self):
+        return max(0, self.written - self.capacity)
+
+    def read(self, start, n):
+        """Copy of samples [start, start + n); the caller must make sure they are still buffered."""
+        if start < self.oldest() or start + n > self.written:
+            raise IndexError(f"Samples [{start}, {start + n}) not in buffer [{self.oldest()}, {self.written})")
+        begin = start % self.capacity
+        first = min(n, self.capacity - begin)
+        out = np.empty(n, dtype=np.float32)
+        out[:first] = self._buffer[begin:begin + first]
+        out[first:] = self._buffer[:n - first]
+        return out
+
+
+class AudioStream:
+    """One long-lived sd.InputStream feeding an AudioRingBuffer."""
+
+    def __init__(self, sr=16000, buffer_seconds=15, blocksize=1600, device=None):
+        self.sr = sr
+        self.blocksize = blocksize
+        self.device = device
+        self.ring = AudioRingBuffer(int(sr * buffer_seconds))
+        self.overruns = 0       # windows that had already been overwritten when read
+        self.status_errors = 0  # input overflows reported by PortAudio
+        self._stream = None
+
+    def start(self):
+        device = sd.default.device[0] if self.device is None else self.device
+        info = sd.query_devices(device, 'input')
+        if info['max_input_channels'] < 1:
+            raise ValueError(f"Device {device} does not support input channels.")
+        self._stream = sd.InputStream(samplerate=self.sr, channels=1, dtype="float32", device=device,
+                                      blocksize=self.blocksize, callback=self._callback)
+        self._stream.start()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            self.status_errors += 1
+        self.ring.write(indata[:, 0])
+
+    @property
+    def position(self):
+        return self.ring.written
+
+    def wait_for(self, position, timeout=None):
+        """Sleep until `position` samples have been captured. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.ring.written < position:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            missing = (position - self.ring.written) / self.sr
+            time.sleep(min(max(missing, 0.005), 0.05))
+        return True
+
+    def read(self, start, n, timeout=None):
+        """
+        Samples [start, start + n), blocking until they have been captured.
+        If the reader fell so far behind that they were overwritten, the most
+        recent n samples are returned instead. Returns an empty array on timeout.
+        """
+        if not self.wait_for(start + n, timeout):
+            return np.array([], dtype=np.float32)
+        try:
+            samples = self.ring.read(start, n)
+            # The producer may have lapped us while we were copying
+            overrun = start < self.ring.oldest()
+        except IndexError:
+            overrun = True
+        if overrun:
+            self.overruns += 1
+            samples = self.latest(n)
+        return samples
+
+    def latest(self, n):
+        n = min(n, self.ring.written)
+        return self.ring.read(self.ring.written - n, n)
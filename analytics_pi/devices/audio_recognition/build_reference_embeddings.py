@@ -1,58 +1,130 @@
+import argparse
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import librosa
-from resemblyzer import VoiceEncoder, preprocess_wav
-from scipy.signal import butter, sosfilt
+from audio_dsp import bandpass_filter
+from speaker_gallery import SpeakerGallery, GALLERY_FILENAME
 
 AUTHORIZED_USERS = ["claire", "claris", "gavin", "waafi", "vianiece"]
 NUM_SAMPLES = 15         # number of recordings per user
 RECORDINGS_DIR = "recordings"  # folder containing recordings
 OUTPUT_DIR = "."         # folder to save the reference embeddings
 TARGET_SR = 16000        # Resemblyzer works well with 16kHz
+CACHE_FILE = os.path.join(OUTPUT_DIR, "embedding_cache.npz")        # per-recording embeddings by file hash
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, "enrollment_manifest.json")  # recording hashes behind each ref_<user>.npy
+
+# VoiceEncoder, created once per (worker) process.
+encoder = None
+
+def init_worker():
+    global encoder
+    import torch
+    from resemblyzer import VoiceEncoder
+
+    torch.set_num_threads(1)  # one process per core instead of one process using every core
+    encoder = VoiceEncoder("cpu", verbose=False)
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
-# Initialize VoiceEncoder in CPU mode.
-encoder = VoiceEncoder("cpu")
-
-def bandpass_filter(data, sr, lowcut=300, highcut=3400, order=5):
-    """
-    Applies a Butterworth bandpass filter to keep frequencies between lowcut and highcut.
-    This helps reduce static noise outside the speech frequency range.
-    """
-    nyq = 0.5 * sr
-    low = lowcut / nyq
-    high = highcut / nyq
-    sos = butter(order, [low, high], btype='band', output='sos')
-    return sosfilt(sos, data)
-
-def build_reference_embedding(user, num_samples):
-    embeddings = []
+def embed_recording(wav_path):
+    from resemblyzer import preprocess_wav
+
+    # Load audio at the target sample rate
+    audio, sr = librosa.load(wav_path, sr=TARGET_SR)
+    # Apply bandpass filter to reduce static noise before processing
+    audio_filtered = bandpass_filter(audio, sr, lowcut=300, highcut=3400, order=5)
+    # Preprocess the filtered audio for the voice encoder
+    wav = preprocess_wav(audio_filtered, source_sr=TARGET_SR)
+    return encoder.embed_utterance(wav)
+
+def list_recordings(user, num_samples):
+    paths = []
     for i in range(1, num_samples + 1):
         wav_path = os.path.join(RECORDINGS_DIR, f"{user}_sample{i}.wav")
         if not os.path.isfile(wav_path):
             print(f"Warning: missing file: {wav_path}")
             continue
-        # Load audio at the target sample rate
-        audio, sr = librosa.load(wav_path, sr=TARGET_SR)
-        # Apply bandpass filter to reduce static noise before processing
-        audio_filtered = bandpass_filter(audio, sr, lowcut=300, highcut=3400, order=5)
-        # Preprocess the filtered audio for the voice encoder
-        wav = preprocess_wav(audio_filtered, source_sr=TARGET_SR)
-        emb = encoder.embed_utterance(wav)
-        embeddings.append(emb)
-    if not embeddings:
-        return None
-    return np.mean(embeddings, axis=0)
-
-def main():
+        paths.append(wav_path)
+    return paths
+
+def load_cache():
+    if not os.path.isfile(CACHE_FILE):
+        return {}
+    with np.load(CACHE_FILE) as data:
+        return dict(zip(data["hashes"].tolist(), data["embeddings"]))
+
+def save_cache(cache):
+    hashes = sorted(cache)
+    np.savez(CACHE_FILE, hashes=np.array(hashes), embeddings=np.array([cache[h] for h in hashes]))
+
+def load_manifest():
+    if not os.path.isfile(MANIFEST_FILE):
+        return {}
+    with open(MANIFEST_FILE) as f:
+        return json.load(f)
+
+def main(workers=None, force=False):
+    recordings = {user: list_recordings(user, NUM_SAMPLES) for user in AUTHORIZED_USERS}
+    hashes = {user: [file_hash(p) for p in paths] for user, paths in recordings.items()}
+    cache = {} if force else load_cache()
+    manifest = {} if force else load_manifest()
+
+    # Embed only recordings whose contents have not been seen before
+    pending = {}
     for user in AUTHORIZED_USERS:
-        print(f"Processing user: {user}")
-        ref_emb = build_reference_embedding(user, NUM_SAMPLES)
-        if ref_emb is None:
+        for path, digest in zip(recordings[user], hashes[user]):
+            if digest not in cache and digest not in pending:
+                pending[digest] = path
+    total = sum(len(h) for h in hashes.values())
+    print(f"{total} recordings, {total - len(pending)} cached, {len(pending)} to embed")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+            for (digest, path), emb in zip(pending.items(), pool.map(embed_recording, pending.values())):
+                print(f"Embedded {path}")
+                cache[digest] = emb
+
+    gallery_embeddings = []
+    gallery_labels = []
+    for user in AUTHORIZED_USERS:
+        if not hashes[user]:
             print(f"No valid audio found for user {user}. Skipping.")
+            manifest.pop(user, None)
             continue
+        embeddings = [cache[digest] for digest in hashes[user]]
+        gallery_embeddings += embeddings
+        gallery_labels += [user] * len(embeddings)
+
+        # Per-user mean, still used when no gallery file is present; only rewritten when its recordings changed
         out_path = os.path.join(OUTPUT_DIR, f"ref_{user}.npy")
-        np.save(out_path, ref_emb)
-        print(f"Saved reference embedding for '{user}' at: {out_path}\n")
+        if manifest.get(user) != hashes[user] or not os.path.isfile(out_path):
+            np.save(out_path, np.mean(embeddings, axis=0))
+            manifest[user] = hashes[user]
+            print(f"Saved reference embedding for '{user}' at: {out_path}")
+        else:
+            print(f"Reference embedding for '{user}' is up to date")
+
+    live = {digest for user_hashes in hashes.values() for digest in user_hashes}
+    save_cache({digest: emb for digest, emb in cache.items() if digest in live})
+    with open(MANIFEST_FILE, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    gallery_path = os.path.join(OUTPUT_DIR, GALLERY_FILENAME)
+    SpeakerGallery(np.array(gallery_embeddings), gallery_labels).save(gallery_path)
+    print(f"Saved speaker gallery ({len(gallery_labels)} samples) at: {gallery_path}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Build voice reference embeddings from recordings/")
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="ignore the cache and re-embed every recording")
+    args = parser.parse_args()
+    main(workers=args.workers, force=args.force)
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+
+GALLERY_FILENAME = "speaker_gallery.npz"
+EMBEDDING_SIZE = 256  # Resemblyzer utterance embedding length
+
+
+class SpeakerGallery:
+    """
+    Every enrolled per-sample voice embedding in one L2-normalised float32 matrix
+    with a parallel label array. Scoring an utterance is a single matrix-vector
+    product (cosine similarity against all samples) followed by a per-user
+    aggregation: "max" (best matching sample) or "topk" (mean of the k best).
+
+    An empty gallery is valid (len() == 0) so callers can report the missing
+    references themselves; it scores every utterance as "Unknown".
+    """
+
+    def __init__(self, embeddings, labels):
+        if len(labels) == 0:
+            matrix = np.zeros((0, EMBEDDING_SIZE), dtype=np.float32)
+        else:
+            matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(labels), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = np.ascontiguousarray(matrix / np.maximum(norms, 1e-9))
+        self.labels = np.asarray(labels)
+        self.users, self.label_ids = np.unique(self.labels, return_inverse=True)
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["embeddings"], data["labels"])
+
+    @classmethod
+    def from_reference_files(cls, directory, users):
+        """Fallback for the older per-user mean embeddings (ref_<user>.npy), one row per user."""
+        embeddings, labels = [], []
+        for user in users:
+            path = os.path.join(directory, f"ref_{user}.npy")
+            if os.path.isfile(path):
+                embeddings.append(np.load(path))
+                labels.append(user)
+            else:
+                print(f"[WARN] Missing reference embedding: {path}")
+        return cls(np.array(embeddings), labels)
+
+    def save(self, path):
+        np.savez(path, embeddings=self.matrix, labels=self.labels)
+
+    def user_scores(self, embedding, method="max", k=3):
+        """Cosine similarity of one embedding to every user, shape (len(self.users),)."""
+        query = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        query = query / max(np.linalg.norm(query), 1e-9)
+        sims = self.matrix @ query
+
+        if method == "max":
+            scores = np.full(len(self.users), -np.inf, dtype=np.float32)
+            np.maximum.at(scores, self.label_ids, sims)
+            return scores
+
+        if method == "topk":
+            scores = np.empty(len(self.users), dtype=np.float32)
+            for uid in range(len(self.users)):
+                user_sims = sims[self.label_ids == uid]
+                top = np.partition(user_sims, -min(k, len(user_sims)))[-min(k, len(user_sims)):]
+                scores[uid] = top.mean()
+            return scores
+
+        raise ValueError(f"Unknown aggregation method: {method}")
+
+    def best(self, embedding, method="max", k=3):
+        """(user, score) of the best matching user."""
+        if len(self) == 0:
+            return "Unknown", float("-inf")
+        scores = self.user_scores(embedding, method=method, k=k)
+        best = int(np.argmax(scores))
+        return str(self.users[best]), float(scores[best])
@@ -1,96 +1,120 @@
 # File: /analytics_pi/devices/voice_recognition/voice_auth.py
 
 import numpy as np
-import sounddevice as sd
-import time
 from resemblyzer import VoiceEncoder, preprocess_wav
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.signal import butter, sosfilt
+from devices.audio_recognition.audio_dsp import bandpass_filter, VoiceActivityDetector
 import os
-from mqtt.mqtt_live_feed import publish_alert
-from mqtt.mqtt_config import connect_mqtt, MQTT_VOICE_ALERT_TOPIC
+from mqtt.mqtt_config import MQTT_VOICE_ALERT_TOPIC
+from mqtt.alert_engine import get_alert_engine
+from telemetry.metrics import metrics
+from devices.audio_recognition.audio_stream import AudioStream
+from devices.audio_recognition.speaker_gallery import SpeakerGallery, GALLERY_FILENAME
 
 AUTHORIZED_USERS = ["claire", "claris", "gavin", "waafi", "vianiece"]
 SIMILARITY_THRESHOLD = 0.7
+SCORE_METHOD = "max"          # per-user aggregation over enrolled samples: "max" or "topk"
+SCORE_TOP_K = 3
 SAMPLE_DURATION = 3
 TARGET_SR = 16000
 SILENCE_THRESHOLD = 0.2
+CHUNK_DURATION = 0.5          # seconds of audio per voice-activity check
+AUDIO_BUFFER_SECONDS = 15     # history kept by the capture ring buffer
+
+# Streaming verification: partial embeddings over a sliding window, decided early
+VOICE_AUTH_MODE = "streaming"  # or "multi_attempt" for the original three 3 s clips
+STREAM_WINDOW = 1.6            # seconds per partial embedding (Resemblyzer's partial size)
+STREAM_HOP = 0.4               # seconds between partial embeddings
+STREAM_MAX_DURATION = 3.0      # give up waiting for a confident verdict after this much audio
+STREAM_MIN_WINDOWS = 2         # partials required before deciding early
+ACCEPT_MARGIN = 0.05           # accept once the best score clears SIMILARITY_THRESHOLD + margin
+REJECT_MARGIN = 0.10           # reject once it falls below SIMILARITY_THRESHOLD - margin
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# MQTT Setup
-mqtt_client = connect_mqtt()
+# Alerts go through the shared alert engine (dedupe, rate limits, batching)
+alert_engine = get_alert_engine()
 
 # Voice encoder
 print("[INFO] Loading voice encoder model on CPU...")
 encoder = VoiceEncoder("cpu")
 
-# Load reference embeddings
-reference_embeddings = {}
-for user in AUTHORIZED_USERS:
-    emb_path = os.path.join(CURRENT_DIR, f"ref_{user}.npy")
-    if os.path.isfile(emb_path):
-        reference_embeddings[user] = np.load(emb_path)
-        print(f"[INFO] Loaded reference for {user}")
-    else:
-        print(f"[WARN] Missing reference embedding: {emb_path}")
-
-if not reference_embeddings:
+# Load speaker gallery (every enrolled sample), falling back to the per-user ref_<user>.npy means
+gallery_path = os.path.join(CURRENT_DIR, GALLERY_FILENAME)
+if os.path.isfile(gallery_path):
+    gallery = SpeakerGallery.load(gallery_path)
+else:
+    print(f"[WARN] {GALLERY_FILENAME} not found, using per-user reference embeddings")
+    gallery = SpeakerGallery.from_reference_files(CURRENT_DIR, AUTHORIZED_USERS)
+
+if len(gallery) == 0:
     raise RuntimeError("[ERROR] No reference embeddings available!")
+print(f"[INFO] Loaded {len(gallery)} reference embeddings for {', '.join(gallery.users)}")
+
+# Band-pass + webrtcvad front-end (RMS energy fallback without webrtcvad)
+vad = VoiceActivityDetector(sr=TARGET_SR, aggressiveness=2, min_speech_ratio=0.3, energy_threshold=0.025)
+
+# Single long-lived capture stream, started on first use
+audio_stream = None
+
+def get_audio_stream():
+    global audio_stream
+    if audio_stream is None:
+        audio_stream = AudioStream(sr=TARGET_SR, buffer_seconds=AUDIO_BUFFER_SECONDS).start()
+    return audio_stream
 
-def bandpass_filter(data, sr, lowcut=300, highcut=3400, order=5):
+def record_audio(duration=SAMPLE_DURATION, sr=TARGET_SR, start=None):
     """
-    Applies a Butterworth bandpass filter to keep frequencies between lowcut and highcut.
+    Returns `duration` seconds of audio from the continuous capture stream,
+    starting at sample position `start` (default: now), blocking until it has arrived.
     """
-    nyq = 0.5 * sr
-    low = lowcut / nyq
-    high = highcut / nyq
-    sos = butter(order, [low, high], btype='band', output='sos')
-    return sosfilt(sos, data)
-
-def record_audio(duration=SAMPLE_DURATION, sr=TARGET_SR):
     try:
-        input_device = sd.default.device[0]  # or use `sd.query_devices(kind='input')` to explore
-        info = sd.query_devices(input_device, 'input')
-        channels = info['max_input_channels']
-        if channels < 1:
-            raise ValueError(f"Device {input_device} does not support input channels.")
-
-        audio = sd.rec(int(sr * duration), samplerate=sr, channels=1, dtype="float32", device=input_device)
-        sd.wait()
-        return audio.flatten()
+        stream = get_audio_stream()
+        if start is None:
+            start = stream.position
+        return stream.read(start, int(stream.sr * duration), timeout=duration + 2.0)
     except Exception as e:
         print(f"[ERROR] Failed to record audio: {e}")
         return np.array([])
 
 def compute_embedding(audio, sr=TARGET_SR):
     # Apply bandpass filter to reduce static noise before preprocessing
-    filtered_audio = bandpass_filter(audio, sr, lowcut=300, highcut=3400, order=5)
-    wav = preprocess_wav(filtered_audio, source_sr=sr)
-    emb = encoder.embed_utterance(wav)
+    with metrics.timed("embed"):
+        filtered_audio = bandpass_filter(audio, sr, lowcut=300, highcut=3400, order=5)
+        wav = preprocess_wav(filtered_audio, source_sr=sr)
+        emb = encoder.embed_utterance(wav)
     return emb
 
-def is_voice_detected(audio, threshold=0.025):
-    filtered = bandpass_filter(audio, sr=TARGET_SR, lowcut=300, highcut=3400)
-    energy = np.sqrt(np.mean(np.square(filtered)))
-    print(f"[DEBUG] Filtered RMS energy: {energy:.5f}")
-    return energy > threshold
+def is_voice_detected(audio, stream=False):
+    """
+    VAD on a self-contained clip, or with stream=True on the next consecutive
+    chunk of the capture stream (filter state carried over from the previous one).
+    """
+    with metrics.timed("vad"):
+        detected = vad.process(audio) if stream else vad.detect(audio)
+    print(f"[DEBUG] VAD score: {vad.last_score:.3f}")
+    return detected
 
 
 
 
-def authenticate_multi_attempt(num_attempts=3):
+def authenticate_multi_attempt(num_attempts=3, start=None):
+    """
+    Embeds `num_attempts` back-to-back SAMPLE_DURATION windows read from the
+    capture buffer, beginning at sample position `start` (default: now).
+    """
     collected_embeddings = []
+    position = get_audio_stream().position if start is None else start
+    window = int(TARGET_SR * SAMPLE_DURATION)
 
     for attempt in range(num_attempts):
         print(f"[VOICE LOOP] Recording attempt {attempt + 1}/{num_attempts}...")
-        audio = record_audio(duration=SAMPLE_DURATION)
+        audio = record_audio(duration=SAMPLE_DURATION, start=position)
+        position += window
         if audio.size == 0 or not is_voice_detected(audio):
             print("[INFO] No valid voice detected. Skipping this attempt.")
             continue
 
         emb = compute_embedding(audio)
         collected_embeddings.append(emb)
-        time.sleep(0.5)  # slight pause between attempts
 
     if not collected_embeddings:
         print("[WARN] No usable recordings captured.")
@@ -99,38 +123,101 @@ def authenticate_multi_attempt(num_attempts=3):
     return np.mean(collected_embeddings, axis=0)
 
 
+def score_embedding(emb):
+    """Best matching user and cosine similarity for one embedding."""
+    return gallery.best(emb, method=SCORE_METHOD, k=SCORE_TOP_K)
+
+
+def authenticate_streaming(start, max_duration=STREAM_MAX_DURATION):
+    """
+    Embeds STREAM_WINDOW windows every STREAM_HOP seconds as the audio arrives,
+    keeping a running (normalised) mean of the partial embeddings, and returns
+    as soon as the score clears the accept or reject margin.
+    Returns (best_user, best_score, windows_used), or None when no voiced window was heard.
+    """
+    window = int(TARGET_SR * STREAM_WINDOW)
+    hop = int(TARGET_SR * STREAM_HOP)
+    last_end = start + int(TARGET_SR * max_duration)
+    running_sum = None
+    used = 0
+    best_user, best_score = None, 0.0
+
+    end = start + window
+    while end <= last_end:
+        audio = record_audio(duration=STREAM_WINDOW, start=end - window)
+        end += hop
+        if audio.size == 0 or not is_voice_detected(audio):
+            continue
+
+        emb = compute_embedding(audio)
+        emb = emb / (np.linalg.norm(emb) + 1e-9)
+        running_sum = emb if running_sum is None else running_sum + emb
+        used += 1
+
+        best_user, best_score = score_embedding(running_sum / np.linalg.norm(running_sum))
+        print(f"[VOICE LOOP] Partial {used}: {best_user} ({best_score:.3f})")
+        if used >= STREAM_MIN_WINDOWS and (best_score >= SIMILARITY_THRESHOLD + ACCEPT_MARGIN
+                                           or best_score < SIMILARITY_THRESHOLD - REJECT_MARGIN):
+            break
+
+    if used == 0:
+        print("[WARN] No usable audio captured.")
+        return None
+    return best_user, best_score, used
+
+
 def voice_loop():
     print("[VOICE LOOP] Listening for voice activity...")
+    try:
+        stream = get_audio_stream()
+    except Exception as e:
+        print(f"[ERROR] Failed to open audio input stream: {e}")
+        return
+    chunk_samples = int(TARGET_SR * CHUNK_DURATION)
+    position = stream.position
     while True:
-        chunk = record_audio(duration=0.5)
+        # Consecutive chunks from the ring buffer, so no audio falls between checks
+        chunk_start = position
+        overruns = stream.overruns
+        chunk = record_audio(duration=CHUNK_DURATION, start=chunk_start)
+        position += chunk_samples
 
         if chunk.size == 0:
+            position = stream.position
+            vad.reset()
             continue
 
-        if is_voice_detected(chunk):
-            print("[VOICE LOOP] Voice detected! Performing multi-attempt auth...")
-
-            avg_emb = authenticate_multi_attempt(num_attempts=3)
-            if avg_emb is None:
-                continue  # Skip if no usable attempts
-
-            # Compare to reference embeddings
-            similarities = {
-                user: cosine_similarity(avg_emb.reshape(1, -1), ref_emb.reshape(1, -1))[0][0]
-                for user, ref_emb in reference_embeddings.items()
-            }
-
-            best_user = max(similarities, key=similarities.get)
-            best_score = similarities[best_user]
+        if stream.overruns != overruns:
+            # Fell behind and got the latest samples instead: resume after them, with fresh VAD state
+            position = stream.position
+            chunk_start = position - chunk.size
+            vad.reset()
+
+        if is_voice_detected(chunk, stream=True):
+            # Include the chunk that woke us up in the audio being verified
+            if VOICE_AUTH_MODE == "streaming":
+                print("[VOICE LOOP] Voice detected! Performing streaming auth...")
+                verdict = authenticate_streaming(start=chunk_start)
+                position = stream.position
+                vad.reset()  # the chunk stream restarts after a gap
+                if verdict is None:
+                    continue
+                best_user, best_score, _ = verdict
+            else:
+                print("[VOICE LOOP] Voice detected! Performing multi-attempt auth...")
+                avg_emb = authenticate_multi_attempt(num_attempts=3, start=chunk_start)
+                position = stream.position
+                vad.reset()  # the chunk stream restarts after a gap
+                if avg_emb is None:
+                    continue  # Skip if no usable attempts
+
+                # Compare to reference embeddings
+                best_user, best_score = score_embedding(avg_emb)
 
             print(f"[INFO] Highest similarity: {best_user} ({best_score:.3f})")
-            msg = (
-                f"Recognized voice: {best_user}"
-                if best_score >= SIMILARITY_THRESHOLD
-                else "Unrecognized voice detected"
-            )
-
-            publish_alert(mqtt_client, msg, topic=MQTT_VOICE_ALERT_TOPIC)
-            print("[MQTT] Alert published:", msg)
+            recognized = best_score >= SIMILARITY_THRESHOLD
+            msg = f"Recognized voice: {best_user}" if recognized else "Unrecognized voice detected"
 
-        time.sleep(0.3)  # small cooldown
+            # Unknown speakers share one key, so they never suppress (or get suppressed by) the user they resemble
+            if alert_engine.report(MQTT_VOICE_ALERT_TOPIC, msg, key=best_user if recognized else "unknown"):
+                print("[MQTT] Alert queued:", msg)
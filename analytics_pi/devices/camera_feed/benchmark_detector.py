@@ -0,0 +1,172 @@
+"""
+Compares object detector backends against the current path (ultralytics/PyTorch at 640).
+
+Runs every backend over the same frames (a video file or a folder of images) and
+reports per-frame latency plus mAP of each candidate measured against the
+reference backend's detections, i.e. how much accuracy the faster path gives up.
+
+    python benchmark_detector.py --source clip.mp4 --candidates onnx:640 onnx:320 onnx-int8:320 ultralytics:320
+"""
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from detector_backends import load_backend
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+REFERENCE = "ultralytics:640"
+GT_CONFIDENCE = 0.5      # reference detections kept as ground truth (the runtime threshold)
+EVAL_CONFIDENCE = 0.25   # candidates keep low-confidence boxes so the PR curve is complete
+
+
+def load_frames(source, limit):
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths += [os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        frames = [cv2.imread(p) for p in sorted(paths)[:limit]]
+        return [f for f in frames if f is not None]
+
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def make_backend(spec):
+    """spec is "<backend>:<imgsz>" with backend one of ultralytics, onnx, onnx-int8."""
+    name, imgsz = spec.split(":")
+    imgsz = int(imgsz)
+    if name == "ultralytics":
+        return load_backend("ultralytics", os.path.join(CURRENT_DIR, "yolov8n.pt"), imgsz=imgsz, conf=EVAL_CONFIDENCE)
+    suffix = "_int8" if name == "onnx-int8" else ""
+    path = os.path.join(CURRENT_DIR, f"yolov8n_{imgsz}{suffix}.onnx")
+    return load_backend("onnx", path, imgsz=imgsz, conf=EVAL_CONFIDENCE)
+
+
+def run_backend(backend, frames, warmup=3):
+    for frame in frames[:warmup]:
+        backend.detect(frame)
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(backend.detect(frame))
+        latencies.append(time.perf_counter() - start)
+    return detections, np.array(latencies) * 1000.0
+
+
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def average_precision(ground_truth, predictions, cls, iou_threshold):
+    """All-point interpolated AP for one class over all frames."""
+    gt = [boxes[classes == cls] for boxes, _, classes in ground_truth]
+    num_gt = sum(len(g) for g in gt)
+    if num_gt == 0:
+        return None
+
+    records = []  # (score, frame index, box)
+    for i, (boxes, scores, classes) in enumerate(predictions):
+        mask = classes == cls
+        records += [(s, i, b) for s, b in zip(scores[mask], boxes[mask])]
+    if not records:
+        return 0.0
+    records.sort(key=lambda r: -r[0])
+
+    used = [np.zeros(len(g), dtype=bool) for g in gt]
+    tp = np.zeros(len(records))
+    for k, (_, i, box) in enumerate(records):
+        if len(gt[i]) == 0:
+            continue
+        ious = iou_matrix(box[None, :], gt[i])[0]
+        ious[used[i]] = 0.0
+        best = int(np.argmax(ious))
+        if ious[best] >= iou_threshold:
+            used[i][best] = True
+            tp[k] = 1
+
+    tp_cum = np.cumsum(tp)
+    recall = tp_cum / num_gt
+    precision = tp_cum / np.arange(1, len(records) + 1)
+    recall = np.concatenate([[0.0], recall, [1.0]])
+    precision = np.concatenate([[1.0], precision, [0.0]])
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    steps = np.flatnonzero(recall[1:] != recall[:-1])
+    return float(np.sum((recall[steps + 1] - recall[steps]) * precision[steps + 1]))
+
+
+def mean_average_precision(ground_truth, predictions, iou_thresholds):
+    classes = np.unique(np.concatenate([c for _, _, c in ground_truth])) if ground_truth else []
+    per_threshold = []
+    for t in iou_thresholds:
+        aps = [average_precision(ground_truth, predictions, c, t) for c in classes]
+        aps = [ap for ap in aps if ap is not None]
+        per_threshold.append(np.mean(aps) if aps else float("nan"))
+    return float(np.mean(per_threshold))
+
+
+def summarize(latencies):
+    return {
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "fps": float(1000.0 / latencies.mean()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark object detector backends")
+    parser.add_argument("--source", required=True, help="video file or folder of images")
+    parser.add_argument("--candidates", nargs="+", default=["ultralytics:320", "onnx:640", "onnx:320", "onnx-int8:320"])
+    parser.add_argument("--limit", type=int, default=200, help="maximum number of frames")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.limit)
+    if not frames:
+        raise SystemExit(f"[ERROR] No frames loaded from {args.source}")
+    print(f"[INFO] Loaded {len(frames)} frames from {args.source}")
+
+    reference_detections, reference_latency = run_backend(make_backend(REFERENCE), frames)
+    ground_truth = [(b[s >= GT_CONFIDENCE], s[s >= GT_CONFIDENCE], c[s >= GT_CONFIDENCE])
+                    for b, s, c in reference_detections]
+    results = {REFERENCE: dict(summarize(reference_latency), map50=1.0, map50_95=1.0)}
+
+    for spec in args.candidates:
+        try:
+            detections, latency = run_backend(make_backend(spec), frames)
+        except Exception as e:
+            print(f"[WARN] Skipping {spec}: {e}")
+            continue
+        results[spec] = dict(summarize(latency),
+                             map50=mean_average_precision(ground_truth, detections, [0.5]),
+                             map50_95=mean_average_precision(ground_truth, detections, np.arange(0.5, 0.96, 0.05)))
+
+    base = results[REFERENCE]
+    print(f"\n{'backend':<18}{'mean ms':>10}{'p95 ms':>10}{'fps':>8}{'speedup':>9}{'mAP50 d':>10}{'mAP50-95 d':>12}")
+    for spec, r in results.items():
+        print(f"{spec:<18}{r['mean_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['fps']:>8.1f}"
+              f"{base['mean_ms'] / r['mean_ms']:>8.2f}x{r['map50'] - base['map50']:>+10.3f}{r['map50_95'] - base['map50_95']:>+12.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"reference": REFERENCE, "frames": len(frames), "results": results}, f, indent=2)
+        print(f"\n[INFO] Results written to {args.json}")
@@ -0,0 +1,115 @@
+import ast
+
+import cv2
+import numpy as np
+
+# Every backend's detect() returns the same plain NumPy arrays:
+#   boxes   (N, 4) float32 xyxy in input-frame pixels
+#   scores  (N,)   float32
+#   classes (N,)   int64 class ids, names looked up via backend.names
+
+
+class UltralyticsBackend:
+    """Current path: ultralytics YOLO in PyTorch eager mode."""
+
+    def __init__(self, model_path, imgsz=640, conf=0.5, iou=0.7):
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+        self.imgsz = imgsz
+        self.conf = conf
+        self.iou = iou
+
+    def detect(self, frame):
+        result = self.model.predict(source=frame, imgsz=self.imgsz, conf=self.conf, iou=self.iou,
+                                    stream=False, verbose=False)[0]
+        boxes = result.boxes
+        return (boxes.xyxy.cpu().numpy().astype(np.float32),
+                boxes.conf.cpu().numpy().astype(np.float32),
+                boxes.cls.cpu().numpy().astype(np.int64))
+
+
+def letterbox(frame, size, color=(114, 114, 114)):
+    """Resize keeping aspect ratio and pad to size x size, as YOLO was trained. Returns image, scale, (pad_x, pad_y)."""
+    h, w = frame.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), color, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+    return canvas, scale, (pad_x, pad_y)
+
+
+def preprocess(frame, size):
+    """BGR frame -> (1, 3, size, size) float32 RGB blob in [0, 1], plus the letterbox transform."""
+    image, scale, pad = letterbox(frame, size)
+    blob = cv2.dnn.blobFromImage(image, scalefactor=1 / 255.0, swapRB=True)
+    return blob, scale, pad
+
+
+class OnnxBackend:
+    """
+    Exported YOLOv8 graph run with onnxruntime on the CPU. Works for both the
+    float model and the int8-quantized one written by export_detector.py.
+    """
+
+    def __init__(self, model_path, imgsz=640, conf=0.5, iou=0.7, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        # The exported graph has a fixed input size, which wins over the requested one
+        shape = self.session.get_inputs()[0].shape
+        self.imgsz = shape[2] if isinstance(shape[2], int) else imgsz
+        self.conf = conf
+        self.iou = iou
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+
+    def detect(self, frame):
+        blob, scale, (pad_x, pad_y) = preprocess(frame, self.imgsz)
+        output = self.session.run(None, {self.input_name: blob})[0]
+
+        # (1, 4 + num_classes, num_anchors) -> (num_anchors, 4 + num_classes)
+        predictions = output[0].T
+        class_scores = predictions[:, 4:]
+        classes = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(classes)), classes]
+        keep = scores >= self.conf
+        if not keep.any():
+            return np.zeros((0, 4), np.float32), np.zeros(0, np.float32), np.zeros(0, np.int64)
+        predictions, scores, classes = predictions[keep], scores[keep], classes[keep]
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        boxes -= np.array([pad_x, pad_y, pad_x, pad_y], dtype=np.float32)
+        boxes /= scale
+        height, width = frame.shape[:2]
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+
+        # Class-aware NMS, like ultralytics' default
+        xywh = np.concatenate([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]], axis=1)
+        indices = cv2.dnn.NMSBoxesBatched(xywh.tolist(), scores.tolist(), classes.tolist(), self.conf, self.iou)
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        return boxes[indices].astype(np.float32), scores[indices].astype(np.float32), classes[indices].astype(np.int64)
+
+
+BACKENDS = {
+    "ultralytics": UltralyticsBackend,
+    "onnx": OnnxBackend,
+}
+
+
+def load_backend(name, model_path, imgsz=640, conf=0.5, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown detector backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](model_path, imgsz=imgsz, conf=conf, **kwargs)
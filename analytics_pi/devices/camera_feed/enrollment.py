@@ -0,0 +1,96 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import face_recognition
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_DIR = os.path.join(CURRENT_DIR, "dataset")
+ENCODINGS_FILE = os.path.join(CURRENT_DIR, "encodings.pickle")
+CACHE_FILE = os.path.join(CURRENT_DIR, "encoding_cache.pickle")
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def list_images(dataset_dir):
+    image_paths = []
+    for root, _, files in os.walk(dataset_dir):
+        for file in files:
+            if file.lower().endswith(IMAGE_EXTENSIONS):
+                image_paths.append(os.path.join(root, file))
+    return sorted(image_paths)
+
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def encode_image(image_path):
+    """HOG-detects every face in one image and returns its encodings (runs in a worker process)."""
+    image = cv2.imread(image_path)
+    if image is None:
+        return []
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    boxes = face_recognition.face_locations(rgb, model="hog")
+    return face_recognition.face_encodings(rgb, boxes)
+
+
+def load_cache(cache_file):
+    if not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable encoding cache {cache_file}: {e}")
+        return {}
+
+
+def build_encodings(dataset_dir=DATASET_DIR, encodings_file=ENCODINGS_FILE, cache_file=CACHE_FILE, workers=None):
+    """
+    Rebuilds encodings_file from dataset_dir/<name>/*.jpg.
+
+    Encodings are cached per image under the SHA-1 of its contents, so only new
+    or changed images are run through HOG + encoding, and those are spread over
+    a process pool. Cache entries for images that no longer exist are dropped.
+    """
+    image_paths = list_images(dataset_dir)
+    hashes = [file_hash(path) for path in image_paths]
+    cache = load_cache(cache_file)
+
+    pending = {}
+    for path, digest in zip(image_paths, hashes):
+        if digest not in cache and digest not in pending:
+            pending[digest] = path
+
+    print(f"[INFO] {len(image_paths)} images, {len(image_paths) - len(pending)} cached, {len(pending)} to encode")
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            paths = list(pending.values())
+            for i, (digest, encodings) in enumerate(zip(pending, pool.map(encode_image, paths))):
+                print(f"[INFO] Encoded {i + 1}/{len(paths)}: {paths[i]}")
+                cache[digest] = encodings
+
+    known_encodings = []
+    known_names = []
+    for path, digest in zip(image_paths, hashes):
+        name = os.path.basename(os.path.dirname(path))
+        for encoding in cache[digest]:
+            known_encodings.append(encoding)
+            known_names.append(name)
+
+    live = set(hashes)
+    cache = {digest: encodings for digest, encodings in cache.items() if digest in live}
+    with open(cache_file, "wb") as f:
+        pickle.dump(cache, f)
+
+    data = {"encodings": known_encodings, "names": known_names}
+    with open(encodings_file, "wb") as f:
+        pickle.dump(data, f)
+    print(f"[INFO] {len(known_encodings)} encodings saved to '{encodings_file}'.")
+    return data
@@ -0,0 +1,87 @@
+"""
+Exports yolov8n.pt to an ONNX graph for the onnx detector backend and, optionally,
+an int8-quantized copy calibrated on local images.
+
+    python export_detector.py --imgsz 320
+    python export_detector.py --imgsz 320 --int8 --calibration-dir dataset
+
+Select the result in object_detection.py with DETECTOR_BACKEND / INFERENCE_SIZE / USE_INT8.
+"""
+import argparse
+import os
+import shutil
+
+import cv2
+import numpy as np
+
+from detector_backends import preprocess
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(CURRENT_DIR, "yolov8n.pt")
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+def export_onnx(imgsz):
+    from ultralytics import YOLO
+
+    exported = YOLO(MODEL_PATH).export(format="onnx", imgsz=imgsz, opset=12, simplify=True, dynamic=False)
+    out_path = os.path.join(CURRENT_DIR, f"yolov8n_{imgsz}.onnx")
+    shutil.move(exported, out_path)
+    print(f"[INFO] ONNX model saved to {out_path}")
+    return out_path
+
+
+class ImageCalibrationReader:
+    """Feeds letterboxed images to onnxruntime's static quantization calibrator."""
+
+    def __init__(self, image_dir, input_name, imgsz, limit=100):
+        paths = []
+        for root, _, files in os.walk(image_dir):
+            paths += [os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+        self.paths = sorted(paths)[:limit]
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._iter = iter(self.paths)
+
+    def get_next(self):
+        for path in self._iter:
+            image = cv2.imread(path)
+            if image is not None:
+                blob, _, _ = preprocess(image, self.imgsz)
+                return {self.input_name: blob.astype(np.float32)}
+        return None
+
+
+def quantize_int8(onnx_path, imgsz, calibration_dir):
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    prepared_path = onnx_path.replace(".onnx", "_prep.onnx")
+    quant_pre_process(onnx_path, prepared_path)
+
+    input_name = ort.InferenceSession(prepared_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = ImageCalibrationReader(calibration_dir, input_name, imgsz)
+    if not reader.paths:
+        raise RuntimeError(f"No calibration images found in {calibration_dir}")
+    print(f"[INFO] Calibrating int8 model on {len(reader.paths)} images from {calibration_dir}")
+
+    out_path = onnx_path.replace(".onnx", "_int8.onnx")
+    quantize_static(prepared_path, out_path, reader, quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, per_channel=True)
+    os.remove(prepared_path)
+    print(f"[INFO] int8 model saved to {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export YOLOv8n for the onnx detector backend")
+    parser.add_argument("--imgsz", type=int, default=640, help="square inference resolution baked into the graph")
+    parser.add_argument("--int8", action="store_true", help="also write an int8-quantized model")
+    parser.add_argument("--calibration-dir", default=os.path.join(CURRENT_DIR, "dataset"),
+                        help="images used to calibrate int8 activations (ideally frames from the deployed camera)")
+    args = parser.parse_args()
+
+    onnx_path = export_onnx(args.imgsz)
+    if args.int8:
+        quantize_int8(onnx_path, args.imgsz, args.calibration_dir)
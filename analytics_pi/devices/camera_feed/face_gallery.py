@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+
+ENCODING_SIZE = 128  # face_recognition / dlib descriptor length
+
+
+class FaceGallery:
+    """
+    Known face encodings held as one contiguous float32 matrix with a parallel
+    label array, so every face in a frame is matched with a single matrix product.
+
+    Matching methods:
+      - "nearest":  label of the closest known encoding (same result as
+                    face_recognition.compare_faces + face_distance)
+      - "vote":     majority label among the k nearest encodings within tolerance
+      - "centroid": closest per-identity mean encoding
+
+    An empty gallery (nobody enrolled yet) is valid and matches every face as "Unknown".
+    """
+
+    def __init__(self, encodings, names):
+        if len(names) == 0:
+            self.matrix = np.zeros((0, ENCODING_SIZE), dtype=np.float32)
+        else:
+            self.matrix = np.ascontiguousarray(np.asarray(encodings, dtype=np.float32).reshape(len(names), -1))
+        self.labels = np.asarray(names)
+        self.identities, self.label_ids = np.unique(self.labels, return_inverse=True)
+        self._sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+
+        self.centroids = np.zeros((len(self.identities), self.matrix.shape[1]), dtype=np.float32)
+        np.add.at(self.centroids, self.label_ids, self.matrix)
+        self.centroids /= np.bincount(self.label_ids, minlength=len(self.identities))[:, None]
+        self._centroid_sq_norms = np.einsum("ij,ij->i", self.centroids, self.centroids)
+
+    @classmethod
+    def from_pickle(cls, path):
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        return cls(data["encodings"], data["names"])
+
+    def __len__(self):
+        return len(self.labels)
+
+    @staticmethod
+    def _euclidean(queries, matrix, sq_norms):
+        # |q - m|^2 = |q|^2 + |m|^2 - 2 q.m, one GEMM for all query/known pairs
+        q_sq = np.einsum("ij,ij->i", queries, queries)
+        d2 = q_sq[:, None] + sq_norms[None, :] - 2.0 * (queries @ matrix.T)
+        return np.sqrt(np.maximum(d2, 0.0))
+
+    def distances(self, encodings):
+        """Euclidean distances, shape (n_queries, n_known)."""
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+        return self._euclidean(queries, self.matrix, self._sq_norms)
+
+    def match(self, encodings, tolerance=0.6, method="nearest", k=3):
+        """Returns a (name, distance) pair per query; name is "Unknown" when nothing is within tolerance."""
+        if len(encodings) == 0 or len(self) == 0:
+            return [("Unknown", float("inf"))] * len(encodings)
+
+        queries = np.asarray(encodings, dtype=np.float32).reshape(-1, self.matrix.shape[1])
+
+        if method == "centroid":
+            dist = self._euclidean(queries, self.centroids, self._centroid_sq_norms)
+            best = dist.argmin(axis=1)
+            best_dist = dist[np.arange(len(queries)), best]
+            return [(str(self.identities[b]) if d <= tolerance else "Unknown", float(d))
+                    for b, d in zip(best, best_dist)]
+
+        dist = self.distances(queries)
+
+        if method == "nearest":
+            best = dist.argmin(axis=1)
+            best_dist = dist[np.arange(len(queries)), best]
+            return [(str(self.labels[b]) if d <= tolerance else "Unknown", float(d))
+                    for b, d in zip(best, best_dist)]
+
+        if method == "vote":
+            k = min(k, len(self))
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            results = []
+            for row, idx in enumerate(nearest):
+                d = dist[row, idx]
+                within = d <= tolerance
+                if not within.any():
+                    results.append(("Unknown", float(d.min())))
+                    continue
+                ids = self.label_ids[idx[within]]
+                votes = np.bincount(ids, minlength=len(self.identities))
+                # Break vote ties by the smaller summed distance
+                totals = np.bincount(ids, weights=d[within], minlength=len(self.identities))
+                candidates = np.flatnonzero(votes == votes.max())
+                winner = candidates[np.argmin(totals[candidates])]
+                results.append((str(self.identities[winner]), float(d[within][ids == winner].min())))
+            return results
+
+        raise ValueError(f"Unknown match method: {method}")
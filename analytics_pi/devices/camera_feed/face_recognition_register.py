@@ -3,6 +3,7 @@ import os
 import pickle
 import face_recognition
 from datetime import datetime
+from enrollment import build_encodings
 
 # Constants
 DATASET_DIR = "dataset"
@@ -46,33 +47,9 @@ def capture_images(person_name):
     cv2.destroyAllWindows()
 
 def process_images():
-    """Processes the images in the dataset and generates facial encodings."""
+    """Updates the facial encodings, re-encoding only new or changed images in the dataset."""
     print("[INFO] Processing images for face encodings...")
-    image_paths = []
-    for root, _, files in os.walk(DATASET_DIR):
-        for file in files:
-            if file.lower().endswith(('.png', '.jpg', '.jpeg')):
-                image_paths.append(os.path.join(root, file))
-    
-    known_encodings = []
-    known_names = []
-    
-    for image_path in image_paths:
-        print(f"[INFO] Processing {image_path}...")
-        image = cv2.imread(image_path)
-        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        boxes = face_recognition.face_locations(rgb, model="hog")
-        encodings = face_recognition.face_encodings(rgb, boxes)
-        
-        name = os.path.basename(os.path.dirname(image_path))
-        for encoding in encodings:
-            known_encodings.append(encoding)
-            known_names.append(name)
-    
-    data = {"encodings": known_encodings, "names": known_names}
-    with open(ENCODINGS_FILE, "wb") as f:
-        pickle.dump(data, f)
-    print(f"[INFO] Encodings saved to '{ENCODINGS_FILE}'.")
+    build_encodings(dataset_dir=DATASET_DIR, encodings_file=ENCODINGS_FILE)
 
 def recognize_faces():
     """Loads encodings and runs real-time face recognition using webcam."""
@@ -0,0 +1,153 @@
+import itertools
+
+import cv2
+import numpy as np
+
+# Lucas-Kanade optical flow parameters for moving boxes between detections
+LK_PARAMS = dict(winSize=(15, 15), maxLevel=2,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+MIN_TRACK_POINTS = 3
+
+
+class FaceTrack:
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = np.array(box, dtype=np.float32)  # top, right, bottom, left (small-frame coords)
+        self.name = "Unknown"
+        self.confidence = 0.0   # identity confidence, decays every frame until re-identified
+        self.misses = 0         # consecutive detection passes without a matching face
+        self.points = None      # feature points tracked with optical flow
+
+    @property
+    def location(self):
+        return tuple(int(round(v)) for v in self.box)
+
+    def needs_identity(self, threshold):
+        return self.confidence < threshold
+
+
+def box_iou(a, b):
+    """IoU between two sets of (top, right, bottom, left) boxes, shape (len(a), len(b))."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    top = np.maximum(a[:, None, 0], b[None, :, 0])
+    right = np.minimum(a[:, None, 1], b[None, :, 1])
+    bottom = np.minimum(a[:, None, 2], b[None, :, 2])
+    left = np.maximum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(right - left, 0, None) * np.clip(bottom - top, 0, None)
+    area_a = (a[:, 1] - a[:, 3]) * (a[:, 2] - a[:, 0])
+    area_b = (b[:, 1] - b[:, 3]) * (b[:, 2] - b[:, 0])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class FaceTracker:
+    """
+    Keeps faces alive between full HOG detections.
+
+    Every `detect_interval` frames the caller runs the face detector and passes
+    the boxes to update_detections(); on the frames in between, propagate()
+    moves existing boxes with sparse optical flow. Each face keeps a stable
+    track_id, and its identity only needs recomputing when the track is new or
+    its confidence has decayed below `reidentify_below`.
+    """
+
+    def __init__(self, detect_interval=5, iou_threshold=0.3, confidence_decay=0.97,
+                 reidentify_below=0.5, max_misses=2):
+        self.detect_interval = detect_interval
+        self.iou_threshold = iou_threshold
+        self.confidence_decay = confidence_decay
+        self.reidentify_below = reidentify_below
+        self.max_misses = max_misses
+        self.tracks = []
+        self.frame_index = 0
+        self._prev_gray = None
+        self._ids = itertools.count(1)
+
+    def needs_detection(self):
+        return self.frame_index % self.detect_interval == 0
+
+    def reset(self):
+        self.tracks = []
+        self.frame_index = 0
+        self._prev_gray = None
+
+    def _seed_points(self, gray, track):
+        top, right, bottom, left = track.location
+        h, w = gray.shape[:2]
+        top, bottom = max(0, top), min(h, bottom)
+        left, right = max(0, left), min(w, right)
+        if bottom - top < 4 or right - left < 4:
+            track.points = None
+            return
+        mask = np.zeros_like(gray)
+        mask[top:bottom, left:right] = 255
+        track.points = cv2.goodFeaturesToTrack(gray, maxCorners=20, qualityLevel=0.01,
+                                               minDistance=3, mask=mask)
+
+    def _advance(self, gray):
+        for track in self.tracks:
+            track.confidence *= self.confidence_decay
+        self._prev_gray = gray
+        self.frame_index += 1
+
+    def propagate(self, gray):
+        """Move every track with optical flow from the previous frame. Returns the live tracks."""
+        if self._prev_gray is not None and self.tracks:
+            tracked = [t for t in self.tracks if t.points is not None and len(t.points) > 0]
+            if tracked:
+                old_points = np.concatenate([t.points for t in tracked]).astype(np.float32)
+                new_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, old_points, None, **LK_PARAMS)
+                status = status.reshape(-1).astype(bool)
+                offset = 0
+                for track in tracked:
+                    n = len(track.points)
+                    ok = status[offset:offset + n]
+                    if ok.sum() >= MIN_TRACK_POINTS:
+                        dx, dy = np.median((new_points[offset:offset + n] - old_points[offset:offset + n])[ok].reshape(-1, 2), axis=0)
+                        track.box += np.array([dy, dx, dy, dx], dtype=np.float32)
+                    else:
+                        track.misses += 1
+                    offset += n
+            self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for track in self.tracks:
+            self._seed_points(gray, track)
+        self._advance(gray)
+        return self.tracks
+
+    def update_detections(self, gray, locations):
+        """
+        Associate fresh detector boxes with existing tracks by IoU.
+        Returns the tracks whose identity must be (re)computed: new tracks and decayed ones.
+        """
+        unmatched = set(range(len(locations)))
+        matched_tracks = set()
+        if self.tracks and locations:
+            iou = box_iou([t.box for t in self.tracks], locations)
+            # Greedy association, best overlaps first
+            for flat in np.argsort(-iou, axis=None):
+                ti, di = np.unravel_index(flat, iou.shape)
+                if iou[ti, di] < self.iou_threshold:
+                    break
+                if ti in matched_tracks or di not in unmatched:
+                    continue
+                track = self.tracks[ti]
+                track.box = np.array(locations[di], dtype=np.float32)
+                track.misses = 0
+                matched_tracks.add(ti)
+                unmatched.discard(di)
+
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        for di in sorted(unmatched):
+            self.tracks.append(FaceTrack(next(self._ids), locations[di]))
+
+        for track in self.tracks:
+            self._seed_points(gray, track)
+        pending = [t for t in self.tracks if t.misses == 0 and t.needs_identity(self.reidentify_below)]
+        self._advance(gray)
+        return pending
@@ -1,65 +1,106 @@
 import face_recognition
 import cv2
-import numpy as np
-import time
-import pickle
 import os
-from mqtt.mqtt_live_feed import publish_alert
-from mqtt.mqtt_config import connect_mqtt
+from mqtt.alert_engine import get_alert_engine
+from telemetry.metrics import metrics
+from mqtt.mqtt_config import MQTT_ALERT_TOPIC
+from devices.camera_feed.face_tracking import FaceTracker
+from devices.camera_feed.face_gallery import FaceGallery
 
 print("[INFO] facial_recognition module loaded")
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 ENCODINGS_FILE = os.path.join(CURRENT_DIR, "encodings.pickle")
 
-known_face_encodings = []
-known_face_names = []
-mqtt_client = None
+FACE_DETECT_INTERVAL = 5  # full HOG detection every N frames when tracking
+MATCH_TOLERANCE = 0.4
+MATCH_METHOD = "nearest"  # "nearest", "vote" or "centroid", see FaceGallery
+
+gallery = None
+face_tracker = FaceTracker(detect_interval=FACE_DETECT_INTERVAL)
 
 def load_face_data():
-    global known_face_encodings, known_face_names
+    global gallery
     if not os.path.exists(ENCODINGS_FILE):
         raise FileNotFoundError(f"encodings.pickle not found at {ENCODINGS_FILE}")
 
-    with open(ENCODINGS_FILE, "rb") as f:
-        data = pickle.load(f)
-    known_face_encodings = data["encodings"]
-    known_face_names = data["names"]
+    gallery = FaceGallery.from_pickle(ENCODINGS_FILE)
 
 
-def setup_mqtt():
-    global mqtt_client
-    mqtt_client = connect_mqtt()
+def match_faces(face_encodings):
+    """Names for all encodings in a frame, matched against the gallery in one batch."""
+    if len(face_encodings) == 0:
+        return []
+    with metrics.timed("match"):
+        return [name for name, _ in gallery.match(face_encodings, tolerance=MATCH_TOLERANCE, method=MATCH_METHOD)]
 
 
-def process_frame(frame, model='small', cv_scaler=2):
-    if not known_face_encodings or not known_face_names:
+def detect_faces(frame, model='small', cv_scaler=2, tracking=False):
+    """Returns face locations (scaled back to the input frame) and matched names, without drawing."""
+    if gallery is None:
         raise RuntimeError("[ERROR] Face data not loaded. Call load_face_data() first.")
 
     # Downscale for performance
-    small_frame = cv2.resize(frame, (0, 0), fx=(1/cv_scaler), fy=(1/cv_scaler))
+    with metrics.timed("resize"):
+        small_frame = cv2.resize(frame, (0, 0), fx=(1/cv_scaler), fy=(1/cv_scaler))
+    if tracking:
+        return track_faces(small_frame, model=model, cv_scaler=cv_scaler)
     rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
 
     # Detect faces and compute encodings
-    face_locations = face_recognition.face_locations(rgb_small_frame)
-    face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations, model=model)
+    with metrics.timed("hog"):
+        face_locations = face_recognition.face_locations(rgb_small_frame)
+    with metrics.timed("encode"):
+        face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations, model=model)
+
+    face_names = match_faces(face_encodings)
+
+    # Scale face coordinates back up to original size
+    scaled_locations = [(top * cv_scaler, right * cv_scaler, bottom * cv_scaler, left * cv_scaler)
+                        for (top, right, bottom, left) in face_locations]
+
+    return scaled_locations, face_names
+
+
+def track_faces(small_frame, model='small', cv_scaler=2):
+    """
+    Tracking variant of detect_faces: HOG runs every FACE_DETECT_INTERVAL frames and
+    optical flow moves the boxes in between. Faces are only encoded and matched when
+    a new track appears or a track's identity confidence has decayed.
+    """
+    gray = cv2.cvtColor(small_frame, cv2.COLOR_BGR2GRAY)
+
+    if face_tracker.needs_detection():
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        with metrics.timed("hog"):
+            face_locations = face_recognition.face_locations(rgb_small_frame)
+        pending = face_tracker.update_detections(gray, face_locations)
+        if pending:
+            with metrics.timed("encode"):
+                face_encodings = face_recognition.face_encodings(
+                    rgb_small_frame, [t.location for t in pending], model=model)
+            for track, name in zip(pending, match_faces(face_encodings)):
+                track.name = name
+                track.confidence = 1.0
+    else:
+        with metrics.timed("face_track"):
+            face_tracker.propagate(gray)
 
     face_names = []
     scaled_locations = []
-
-    for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-        matches = face_recognition.compare_faces(known_face_encodings, face_encoding, tolerance=0.4)
-        name = "Unknown"
-        face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-        if face_distances.size > 0:
-            best_index = np.argmin(face_distances)
-            if matches[best_index]:
-                name = known_face_names[best_index]
-        face_names.append(name)
-
-        # Scale face coordinates back up to original size
+    for track in face_tracker.tracks:
+        if track.misses:
+            continue
+        top, right, bottom, left = track.location
+        face_names.append(track.name)
         scaled_locations.append((top * cv_scaler, right * cv_scaler, bottom * cv_scaler, left * cv_scaler))
 
+    return scaled_locations, face_names
+
+
+def process_frame(frame, model='small', cv_scaler=2):
+    scaled_locations, face_names = detect_faces(frame, model=model, cv_scaler=cv_scaler)
+
     # Draw annotations on original frame
     annotated_frame = draw_results(frame.copy(), scaled_locations, face_names)
     return annotated_frame, face_names
@@ -90,6 +131,4 @@ def draw_results(frame, face_locations, face_names):
 
 
 def send_alert(message):
-    if mqtt_client is None:
-        setup_mqtt()
-    publish_alert(mqtt_client, message)
+    get_alert_engine().report(MQTT_ALERT_TOPIC, message)
@@ -2,71 +2,86 @@ import cv2
 import time
 import os
 from datetime import datetime
-from ultralytics import YOLO
+from devices.camera_feed.detector_backends import load_backend
+from devices.camera_feed.object_tracker import ObjectTracker
+from devices.camera_feed.snapshot_writer import SnapshotWriter
+from telemetry.metrics import metrics
 
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_FILENAME = "yolov8n.pt"
 MODEL_PATH = os.path.join(CURRENT_DIR, MODEL_FILENAME)
 OUTPUT_DIR = os.path.join(CURRENT_DIR, "detected_items")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+SNAPSHOT_QUOTA_MB = 200     # oldest evidence images are deleted beyond this
+SNAPSHOT_JPEG_QUALITY = 85
+
+# Inference backend: "ultralytics" (PyTorch eager) or "onnx" (onnxruntime on CPU).
+# Create the ONNX / int8 models with export_detector.py and compare them with benchmark_detector.py.
+DETECTOR_BACKEND = "ultralytics"
+INFERENCE_SIZE = 640        # square input size; 320 is roughly 4x cheaper
+USE_INT8 = False            # onnx backend only: use the int8-quantized graph
+CONFIDENCE_THRESHOLD = 0.5
+ONNX_MODEL_PATH = os.path.join(CURRENT_DIR, f"yolov8n_{INFERENCE_SIZE}.onnx")
+ONNX_INT8_MODEL_PATH = os.path.join(CURRENT_DIR, f"yolov8n_{INFERENCE_SIZE}_int8.onnx")
+
+
+def backend_model_path(backend, use_int8=USE_INT8):
+    if backend == "onnx":
+        return ONNX_INT8_MODEL_PATH if use_int8 else ONNX_MODEL_PATH
+    return MODEL_PATH
+
 
 # Load model once
-model = YOLO(MODEL_PATH)
+model = load_backend(DETECTOR_BACKEND, backend_model_path(DETECTOR_BACKEND),
+                     imgsz=INFERENCE_SIZE, conf=CONFIDENCE_THRESHOLD)
 
 # Global tracking variables
-detected_objects = {}
-captured_objects = set()
 stationary_threshold = 10  # seconds
+tracker = ObjectTracker(stationary_radius=10, ttl=5.0, max_tracks=64)
+snapshot_writer = SnapshotWriter(OUTPUT_DIR, max_pending=4, jpeg_quality=SNAPSHOT_JPEG_QUALITY,
+                                 quota_bytes=SNAPSHOT_QUOTA_MB * 1024 * 1024)
 
-def detect_objects(frame):
+def analyze_frame(frame):
+    """
+    Runs detection and stationary-object bookkeeping without drawing on the frame.
+    Returns a list of (x1, y1, x2, y2, label, captured) detections and the alerts as
+    (track_id, message) pairs.
+    """
     alerts = []
+    detections = []
 
     # Perform object detection
-    results = model.predict(source=frame, stream=False, verbose=False, conf=0.5)
-
-    for result in results:
-        for box in result.boxes:
-            try:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf)
-                cls = int(box.cls)
-                label = model.names[cls]
-            except Exception as e:
-                print("[ERROR] Parsing bounding box:", e)
-                continue
-
-            center_x = (x1 + x2) // 2
-            center_y = (y1 + y2) // 2
-
-            # Use a more tolerant grid for keying
-            key = f"{label}_{center_x//50}_{center_y//50}"
-
-            if key in detected_objects:
-                prev_center, first_detected = detected_objects[key]
-                distance = ((center_x - prev_center[0]) ** 2 + (center_y - prev_center[1]) ** 2) ** 0.5
-
-                if distance < 10:
-                    elapsed_time = time.time() - first_detected
-                    if elapsed_time > stationary_threshold and key not in captured_objects:
-                        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                        image_path = os.path.join(OUTPUT_DIR, f"object_{label}_{timestamp}.jpg")
-
-                        # Save image with red box
-                        color = (0, 0, 255)
-                        frame_copy = frame.copy()
-                        cv2.rectangle(frame_copy, (x1, y1), (x2, y2), color, 2)
-                        cv2.putText(frame_copy, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-                        cv2.imwrite(image_path, frame_copy)
-
-                        alert_msg = f"Object detected: {label}"
-                        alerts.append(alert_msg)
-                        captured_objects.add(key)
-            else:
-                detected_objects[key] = ((center_x, center_y), time.time())
-
-            # Draw detection box
-            color = (0, 255, 0) if key in captured_objects else (0, 0, 255)
-            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
-
-    return frame, alerts
\ No newline at end of file
+    with metrics.timed("yolo"):
+        boxes, scores, classes = model.detect(frame)
+
+    now = time.time()
+    tracks = tracker.update(boxes, classes, now)
+
+    for (x1, y1, x2, y2), track in zip(boxes.astype(int).tolist(), tracks):
+        label = model.names[track.label_id]
+
+        if not track.captured and track.stationary_for(now) > stationary_threshold:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+            # Save image with red box (written in the background)
+            snapshot_writer.submit(frame, (x1, y1, x2, y2), label, f"object_{label}_{timestamp}_{track.track_id}.jpg")
+
+            alert_msg = f"Object detected: {label}"
+            alerts.append((track.track_id, alert_msg))
+            track.captured = True
+
+        detections.append((x1, y1, x2, y2, label, track.captured))
+
+    return detections, alerts
+
+
+def draw_detections(frame, detections):
+    for x1, y1, x2, y2, label, captured in detections:
+        color = (0, 255, 0) if captured else (0, 0, 255)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+    return frame
+
+
+def detect_objects(frame):
+    detections, alerts = analyze_frame(frame)
+    return draw_detections(frame, detections), alerts
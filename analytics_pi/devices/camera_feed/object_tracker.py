@@ -0,0 +1,120 @@
+import itertools
+
+import numpy as np
+
+
+class ObjectTrack:
+    def __init__(self, track_id, label_id, box, now):
+        self.track_id = track_id
+        self.label_id = label_id
+        self.box = box
+        self.first_seen = now
+        self.last_seen = now
+        self.anchor = self.center       # where the object has been resting since stationary_since
+        self.stationary_since = now
+        self.captured = False           # alert / snapshot already raised for this track
+
+    @property
+    def center(self):
+        return np.array([(self.box[0] + self.box[2]) / 2, (self.box[1] + self.box[3]) / 2], dtype=np.float32)
+
+    def stationary_for(self, now):
+        return now - self.stationary_since
+
+
+def iou_matrix(a, b):
+    """IoU between (N, 4) and (M, 4) xyxy boxes."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+class ObjectTracker:
+    """
+    IoU / centroid multi-object tracker with bounded state.
+
+    Detections are associated to tracks of the same class greedily by IoU, or by
+    centroid distance when the boxes barely overlap. A track's stationary timer
+    restarts whenever its centre drifts more than `stationary_radius` pixels from
+    where it came to rest. Tracks unseen for `ttl` seconds are evicted, and at
+    most `max_tracks` are kept (least recently seen go first).
+    """
+
+    def __init__(self, iou_threshold=0.3, max_center_distance=50, stationary_radius=10, ttl=5.0, max_tracks=64):
+        self.iou_threshold = iou_threshold
+        self.max_center_distance = max_center_distance
+        self.stationary_radius = stationary_radius
+        self.ttl = ttl
+        self.max_tracks = max_tracks
+        self.tracks = []
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def _associate(self, boxes, classes):
+        """Returns {detection index: track index} for matched pairs."""
+        if not self.tracks or len(boxes) == 0:
+            return {}
+        track_boxes = np.array([t.box for t in self.tracks], dtype=np.float32)
+        track_classes = np.array([t.label_id for t in self.tracks])
+        same_class = track_classes[:, None] == classes[None, :]
+
+        iou = np.where(same_class, iou_matrix(track_boxes, boxes), 0.0)
+        track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+        det_centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        dist = np.linalg.norm(track_centers[:, None, :] - det_centers[None, :, :], axis=2)
+
+        # Higher score is a better match: IoU first, then proximity for low-overlap (small / jittery) boxes
+        close = same_class & (dist < self.max_center_distance)
+        score = np.where(iou >= self.iou_threshold, 1.0 + iou,
+                         np.where(close, 1.0 - dist / self.max_center_distance, 0.0))
+
+        matches = {}
+        used_tracks = set()
+        for flat in np.argsort(-score, axis=None):
+            ti, di = np.unravel_index(flat, score.shape)
+            if score[ti, di] <= 0:
+                break
+            if ti in used_tracks or di in matches:
+                continue
+            matches[int(di)] = int(ti)
+            used_tracks.add(ti)
+        return matches
+
+    def update(self, boxes, classes, now):
+        """
+        Feeds one frame of detections. Returns the track for every detection, in order.
+        boxes is (N, 4) xyxy, classes (N,) class ids.
+        """
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        classes = np.asarray(classes).reshape(-1)
+        matches = self._associate(boxes, classes)
+
+        result = []
+        for di in range(len(boxes)):
+            if di in matches:
+                track = self.tracks[matches[di]]
+                track.box = boxes[di]
+                track.last_seen = now
+                if np.linalg.norm(track.center - track.anchor) > self.stationary_radius:
+                    track.anchor = track.center
+                    track.stationary_since = now
+            else:
+                track = ObjectTrack(next(self._ids), int(classes[di]), boxes[di], now)
+                self.tracks.append(track)
+            result.append(track)
+
+        self.evict(now)
+        return result
+
+    def evict(self, now):
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.ttl]
+        if len(self.tracks) > self.max_tracks:
+            self.tracks.sort(key=lambda t: t.last_seen, reverse=True)
+            del self.tracks[self.max_tracks:]
@@ -0,0 +1,110 @@
+import os
+import queue
+import threading
+from collections import deque
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class SnapshotWriter:
+    """
+    Writes detection evidence images from a background thread.
+
+    submit() only copies the frame into a bounded queue; drawing, JPEG encoding
+    and the (slow, SD-card) file write happen on the writer thread. When the
+    queue is full the snapshot is dropped and counted rather than blocking
+    inference. The output directory is kept under `quota_bytes` by deleting the
+    oldest images first.
+    """
+
+    def __init__(self, output_dir, max_pending=4, jpeg_quality=85, quota_bytes=200 * 1024 * 1024):
+        self.output_dir = output_dir
+        self.jpeg_quality = jpeg_quality
+        self.quota_bytes = quota_bytes
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rotated = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Oldest-first index of the images already on disk
+        existing = []
+        for name in os.listdir(output_dir):
+            path = os.path.join(output_dir, name)
+            if name.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path):
+                stat = os.stat(path)
+                existing.append((stat.st_mtime, path, stat.st_size))
+        existing.sort()
+        self._files = deque((path, size) for _, path, size in existing)
+        self.bytes_used = sum(size for _, size in self._files)
+        self._enforce_quota()
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, box, label, filename, color=(0, 0, 255)):
+        """Queue an evidence image (frame with `box` drawn) for writing. Returns False if it was dropped."""
+        if self._queue.full():
+            self.dropped += 1
+            return False
+        try:
+            self._queue.put_nowait((frame.copy(), box, label, filename, color))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def stats(self):
+        return {
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rotated": self.rotated,
+            "pending": self._queue.qsize(),
+            "bytes_used": self.bytes_used,
+        }
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _enforce_quota(self):
+        while self.bytes_used > self.quota_bytes and len(self._files) > 1:
+            path, size = self._files.popleft()
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[WARN] Could not rotate snapshot {path}: {e}")
+            self.bytes_used -= size
+            self.rotated += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, (x1, y1, x2, y2), label, filename, color = item
+            try:
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+                cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, color, 2)
+                ok, buffer = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+                if not ok:
+                    raise RuntimeError("JPEG encoding failed")
+
+                path = os.path.join(self.output_dir, filename)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(buffer.tobytes())
+                os.replace(tmp_path, path)
+
+                self._files.append((path, len(buffer)))
+                self.bytes_used += len(buffer)
+                self.written += 1
+                self._enforce_quota()
+            except Exception as e:
+                self.failed += 1
+                print(f"[ERROR] Failed to write snapshot {filename}: {e}")
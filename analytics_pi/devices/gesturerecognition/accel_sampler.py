@@ -0,0 +1,130 @@
+import struct
+import threading
+import time
+
+import numpy as np
+
+from telemetry.metrics import metrics
+
+# LIS3DH registers
+ACC_ADDRESS = 0x19
+CTRL_REG1 = 0x20
+OUT_X_L = 0x28
+AUTO_INCREMENT = 0x80  # set on the sub-address so one block read walks OUT_X_L..OUT_Z_H
+CTRL_REG1_10HZ = 0x27  # Normal mode, 10Hz, all axes active (as used when recording the dataset)
+
+
+class AccelRingBuffer:
+    """
+    Single-producer ring buffer of timestamped (x, y, z) samples.
+
+    Like the audio ring buffer, positions are absolute sample counts and the
+    producer only advances `written` after a sample is stored, so readers need
+    no lock as long as they stay within the last `capacity` samples.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.samples = np.zeros((capacity, 3), dtype=np.int16)
+        self.written = 0
+
+    def append(self, timestamp, xyz):
+        slot = self.written % self.capacity
+        self.timestamps[slot] = timestamp
+        self.samples[slot] = xyz
+        self.written += 1
+
+    def oldest(self):
+        return max(0, self.written - self.capacity)
+
+    def read(self, start, end=None):
+        """Copies of (timestamps, samples) for positions [start, end), clipped to what is buffered."""
+        end = self.written if end is None else min(end, self.written)
+        start = max(start, self.oldest())
+        idx = np.arange(start, max(start, end)) % self.capacity
+        return self.timestamps[idx], self.samples[idx]
+
+    def latest(self, n):
+        return self.read(self.written - n)
+
+
+class AccelSampler:
+    """
+    Polls the LIS3DH at a fixed rate on its own thread.
+
+    Each sample is one 6-byte I2C block read of the output registers,
+    timestamped with time.monotonic() and appended to an AccelRingBuffer.
+    Reads are scheduled against absolute deadlines, so the rate does not drift
+    with read latency; if the thread falls more than a period behind it skips
+    ahead instead of bursting to catch up.
+    """
+
+    def __init__(self, rate_hz=20, capacity=256, bus_id=1, address=ACC_ADDRESS, ctrl_reg1=CTRL_REG1_10HZ):
+        self.period = 1.0 / rate_hz
+        self.bus_id = bus_id
+        self.address = address
+        self.ctrl_reg1 = ctrl_reg1
+        self.ring = AccelRingBuffer(capacity)
+        self.errors = 0   # failed I2C reads
+        self.late = 0     # deadlines missed by more than one period
+        self._bus = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        import smbus
+
+        self._bus = smbus.SMBus(self.bus_id)
+        self._bus.write_byte_data(self.address, CTRL_REG1, self.ctrl_reg1)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="accel-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._bus is not None:
+            self._bus.close()
+            self._bus = None
+
+    def read_sample(self):
+        data = self._bus.read_i2c_block_data(self.address, OUT_X_L | AUTO_INCREMENT, 6)
+        return struct.unpack("<hhh", bytes(data))
+
+    def _run(self):
+        deadline = time.monotonic()
+        while self._running:
+            try:
+                with metrics.timed("i2c_read"):
+                    xyz = self.read_sample()
+                self.ring.append(time.monotonic(), xyz)
+            except OSError as e:
+                self.errors += 1
+                metrics.count("i2c_errors")
+                if self.errors == 1 or self.errors % 100 == 0:
+                    print(f"[ERROR] Accelerometer read failed ({self.errors} so far): {e}")
+
+            deadline += self.period
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -self.period:
+                self.late += 1
+                deadline = time.monotonic()
+
+    @property
+    def position(self):
+        return self.ring.written
+
+    def read_since(self, position):
+        """(timestamps, samples, new_position) for every sample captured since `position`."""
+        end = self.ring.written
+        timestamps, samples = self.ring.read(position, end)
+        return timestamps, samples, end
+
+    def latest(self, n):
+        return self.ring.latest(n)
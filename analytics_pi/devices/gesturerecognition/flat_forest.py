@@ -0,0 +1,97 @@
+import numpy as np
+
+
+def export_forest(model, scaler, feature_names, path, window_size=10):
+    """
+    Flattens a fitted RandomForestClassifier (and the StandardScaler in front of it)
+    into concatenated node arrays saved as an .npz.
+
+    Trees test scaled features, (x - mean) / scale <= t, which for scale > 0 is the
+    same split as x <= t * scale + mean, so the scaler is folded into the thresholds
+    and the evaluator works on raw features. Children are interleaved (left at 2i,
+    right at 2i + 1) and leaves point back at themselves with a never-taken right
+    branch, so every tree can be stepped a fixed number of times.
+    """
+    features, thresholds, children, values, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        n = tree.node_count
+        nodes = np.arange(n)
+        leaf = tree.children_left == -1
+
+        feature = np.where(leaf, 0, tree.feature).astype(np.int32)
+        threshold = np.where(leaf, np.inf, tree.threshold * scaler.scale_[feature] + scaler.mean_[feature])
+        left = np.where(leaf, nodes, tree.children_left) + offset
+        right = np.where(leaf, nodes, tree.children_right) + offset
+        pairs = np.stack([left, right], axis=1).reshape(-1)
+
+        value = tree.value[:, 0, :]
+        value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)
+
+        features.append(feature)
+        thresholds.append(threshold)
+        children.append(pairs.astype(np.int32))
+        values.append(value)
+        roots.append(offset)
+        offset += n
+        max_depth = max(max_depth, tree.max_depth)
+
+    np.savez(
+        path,
+        feature=np.concatenate(features),
+        threshold=np.concatenate(thresholds),
+        children=np.concatenate(children),
+        value=np.concatenate(values),
+        roots=np.array(roots, dtype=np.int32),
+        depth=np.array(max_depth),
+        classes=np.asarray(model.classes_).astype(str),
+        feature_names=np.asarray(feature_names).astype(str),
+        window_size=np.array(window_size),
+    )
+
+
+class FlatForest:
+    """
+    Vectorised evaluator for a forest exported by export_forest().
+
+    All trees (and all rows of a batch) advance one level per step with a
+    gather and a compare, for `depth` steps; class probabilities are the mean
+    of the reached leaves' class fractions, as in RandomForestClassifier.
+    predict_one() is the single-sample path used for live gestures.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, depth, classes, feature_names, window_size=10):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depth = int(depth)
+        self.classes = classes
+        self.feature_names = list(feature_names)
+        self.window_size = int(window_size)  # samples per feature window the forest was trained on
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{key: data[key] for key in data.files})
+
+    def predict_proba(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots)))
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+        return self.value[nodes].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def predict_one(self, x):
+        nodes = self.roots
+        for _ in range(self.depth):
+            nodes = self.children[2 * nodes + (x[self.feature[nodes]] > self.threshold[nodes])]
+        return self.classes[np.argmax(self.value[nodes].sum(axis=0))]
@@ -1,102 +1,97 @@
-import smbus
-import pandas as pd
-import numpy as np
-import joblib
 import os
 import time
-from scipy.fft import fft
-from mqtt.mqtt_gesture import publish_gesture_alert
+from mqtt.alert_engine import get_alert_engine
+from mqtt.mqtt_config import MQTT_GESTURE_ALERT_TOPIC
+from devices.gesturerecognition.accel_sampler import AccelSampler
+from devices.gesturerecognition.gesture_features import GestureFeatureWindow, validate_feature_names
+from devices.gesturerecognition.flat_forest import FlatForest
+from telemetry.metrics import metrics
 
 # Path to model files
 CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-model = joblib.load(os.path.join(CURRENT_DIR, "gesture_model.pkl"))
-scaler = joblib.load(os.path.join(CURRENT_DIR, "scaler.pkl"))
-feature_names = joblib.load(os.path.join(CURRENT_DIR, "feature_names.pkl"))
-
-# I2C Setup
-bus = smbus.SMBus(1)
-ACC_ADDRESS = 0x19
-GESTURE_WINDOW_SIZE = 10
-
-data_window = []
-last_gesture_time = 0
+FOREST_PATH = os.path.join(CURRENT_DIR, "gesture_forest.npz")
+
+# Flat-array forest exported by randomforest.py (scaler folded in, no sklearn needed),
+# falling back to the pickled sklearn model and scaler
+forest = None
+model = None
+scaler = None
+if os.path.isfile(FOREST_PATH):
+    forest = FlatForest.load(FOREST_PATH)
+    validate_feature_names(forest.feature_names)
+else:
+    import joblib
+
+    print("[WARN] gesture_forest.npz not found, using the sklearn gesture model")
+    model = joblib.load(os.path.join(CURRENT_DIR, "gesture_model.pkl"))
+    scaler = joblib.load(os.path.join(CURRENT_DIR, "scaler.pkl"))
+    validate_feature_names(joblib.load(os.path.join(CURRENT_DIR, "feature_names.pkl")))
+
+GESTURE_WINDOW_SIZE = forest.window_size if forest is not None else 10
+SAMPLE_RATE_HZ = 20  # matches the 0.05 s polling used to record the dataset
+
+data_window = GestureFeatureWindow(size=GESTURE_WINDOW_SIZE)
 last_prediction = None
-GESTURE_COOLDOWN = 10  # seconds
 VARIANCE_THRESHOLD = 100
 
-def read_accelerometer():
-    def read_word(reg_low, reg_high):
-        low = bus.read_byte_data(ACC_ADDRESS, reg_low)
-        high = bus.read_byte_data(ACC_ADDRESS, reg_high)
-        value = (high << 8) | low
-        return value if value < 32768 else value - 65536
-
-    x = read_word(0x28, 0x29)
-    y = read_word(0x2A, 0x2B)
-    z = read_word(0x2C, 0x2D)
-    return x, y, z
-
-def extract_features(window):
-    window = np.array(window)
-    features = []
-
-    for i in range(3):
-        axis_data = window[:, i]
-        features += [
-            np.mean(axis_data),
-            np.std(axis_data),
-            np.min(axis_data),
-            np.max(axis_data),
-            np.mean(np.abs(axis_data - np.mean(axis_data))),
-            np.sum(axis_data ** 2) / len(axis_data)
-        ]
-
-    for i in range(3):
-        fft_vals = np.abs(fft(window[:, i]))[:len(window) // 2]
-        freq_max = np.argmax(fft_vals)
-        spectral_entropy = -np.sum((fft_vals / np.sum(fft_vals)) * np.log2(fft_vals / np.sum(fft_vals) + 1e-10))
-        features.append(freq_max)
-        features.append(spectral_entropy)
-
-    return np.array(features).reshape(1, -1)
-
-def is_still(window):
-    window = np.array(window)
-    total_variance = np.sum(np.var(window, axis=0))
-    return total_variance < VARIANCE_THRESHOLD
-
-def process_next(mqtt_client):
-    global data_window, last_gesture_time, last_prediction
-    acc_x, acc_y, acc_z = read_accelerometer()
-    data_window.append([acc_x, acc_y, acc_z])
-
-    if len(data_window) == GESTURE_WINDOW_SIZE:
+# Accelerometer sampler thread (I2C bus opened on first use)
+sampler = None
+sampler_position = 0
+SAMPLER_RETRY_INTERVAL = 30  # seconds between attempts to start the sampler after a failure
+sampler_failed_at = None
+
+def get_sampler():
+    """The running sampler, or None while it cannot be started (retried every SAMPLER_RETRY_INTERVAL)."""
+    global sampler, sampler_position, sampler_failed_at
+    if sampler is None:
+        if sampler_failed_at is not None and time.monotonic() - sampler_failed_at < SAMPLER_RETRY_INTERVAL:
+            return None
+        try:
+            sampler = AccelSampler(rate_hz=SAMPLE_RATE_HZ).start()
+        except Exception as e:
+            sampler_failed_at = time.monotonic()
+            print(f"[ERROR] Failed to start accelerometer sampler (retrying in {SAMPLER_RETRY_INTERVAL}s):", e)
+            return None
+        sampler_failed_at = None
+        sampler_position = sampler.position
+    return sampler
+
+def predict_gesture(features):
+    if forest is not None:
+        return forest.predict_one(features)
+    # Scaling applied by hand on a plain array (same as scaler.transform, without the DataFrame round trip)
+    features_scaled = (features - scaler.mean_) / scaler.scale_
+    return model.predict(features_scaled.reshape(1, -1))[0]
+
+def process_next():
+    """Classifies every sample the sampler thread captured since the last call."""
+    global sampler_position
+    if get_sampler() is None:
+        return
+    _, samples, sampler_position = sampler.read_since(sampler_position)
+    for sample in samples:
+        process_sample(sample)
+
+def process_sample(sample):
+    global last_prediction
+    data_window.push(sample)
+
+    if data_window.full:
         # Manually override any model prediction if sensor is physically still
-        if is_still(data_window):
-            data_window.pop(0)
+        if data_window.is_still(VARIANCE_THRESHOLD):
             return  # Completely skip detection and alerting
 
-        features = extract_features(data_window)
-        features_df = pd.DataFrame(features, columns=feature_names)
-        features_scaled = scaler.transform(features_df)
-
-        prediction = model.predict(features_scaled)[0].lower()
-
-        data_window.pop(0)  # Maintain sliding window
+        with metrics.timed("gesture_classify"):
+            prediction = str(predict_gesture(data_window.features())).lower()
 
         # Skip any model-predicted stationary gestures (extra guard)
         if prediction == "stationary":
             return
 
-        now = time.time()
-        if now - last_gesture_time > GESTURE_COOLDOWN:
+        # One key for every movement class, so the alert engine applies a single cooldown (formerly GESTURE_COOLDOWN)
+        if get_alert_engine().report(MQTT_GESTURE_ALERT_TOPIC, "Movement detected!", key="movement"):
             print(f"[GESTURE] Detected: {prediction}")
-            try:
-                publish_gesture_alert(mqtt_client, "Movement detected!")
-                last_gesture_time = now
-                last_prediction = prediction
-            except Exception as e:
-                print("[ERROR] Failed to publish gesture alert:", e)
+            last_prediction = prediction
 
 
 time.sleep(3)  # Sampling rate
@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+
+# Column layout of gestures_dataset.csv / feature_names.pkl, as written by gesturerecognition.py.
+# The header groups names by statistic, but the values are emitted axis by axis (mean, std, min,
+# max, mad, energy for x, then y, then z, then freq_max and entropy per axis). The model was
+# trained on that positional order, so it is what the names must match, not what they say.
+FEATURE_NAMES = [f"{stat}_{axis}"
+                 for stat in ["mean", "std", "min", "max", "mad", "energy", "freq_max", "spectral_entropy"]
+                 for axis in ["x", "y", "z"]]
+
+
+def validate_feature_names(names):
+    if list(names) != FEATURE_NAMES:
+        raise ValueError(f"Unexpected gesture feature columns {list(names)}, expected {FEATURE_NAMES}")
+
+
+class GestureFeatureWindow:
+    """
+    Sliding window of accelerometer samples with incrementally maintained statistics.
+
+    Samples live in a fixed (size, 3) ring; per-axis sums and sums of squares are
+    updated as samples enter and leave, in exact integer arithmetic, so mean, std,
+    energy and the stillness check cost O(1). Min, max and mean absolute deviation
+    are vectorised reductions over the ring. The half-spectrum magnitudes come from a
+    cached DFT matrix; magnitudes are unaffected by the ring's rotation, so the ring
+    never needs reordering. features() matches reference_features() to float rounding.
+    """
+
+    def __init__(self, size=10):
+        self.size = size
+        self.ring = np.zeros((size, 3), dtype=np.int64)
+        self.count = 0
+        self.head = 0  # slot the next sample is written to
+        self.sums = np.zeros(3, dtype=np.int64)
+        self.sumsq = np.zeros(3, dtype=np.int64)
+        k = np.arange(size // 2)[:, None]
+        n = np.arange(size)[None, :]
+        self.dft = np.exp(-2j * np.pi * k * n / size)  # (size // 2, size) half-spectrum DFT
+        self._features = np.empty(24, dtype=np.float64)
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def reset(self):
+        self.count = 0
+        self.head = 0
+        self.sums[:] = 0
+        self.sumsq[:] = 0
+
+    def push(self, sample):
+        sample = np.asarray(sample, dtype=np.int64)
+        if self.full:
+            old = self.ring[self.head]
+            self.sums -= old
+            self.sumsq -= old * old
+        else:
+            self.count += 1
+        self.ring[self.head] = sample
+        self.sums += sample
+        self.sumsq += sample * sample
+        self.head = (self.head + 1) % self.size
+
+    def variance(self):
+        """Population variance per axis, exact up to the final division."""
+        n = self.count
+        return (n * self.sumsq - self.sums * self.sums) / (n * n)  # never negative: the integer sums are exact
+
+    def is_still(self, threshold):
+        return float(np.sum(self.variance())) < threshold
+
+    def features(self):
+        """The 24 features of the current (full) window, in FEATURE_NAMES order. Returns a reused buffer."""
+        n = self.count
+        window = self.ring[:n]
+        mean = self.sums / n
+        stats = self._features[:18].reshape(3, 6)
+        stats[:, 0] = mean
+        stats[:, 1] = np.sqrt(self.variance())
+        stats[:, 2] = window.min(axis=0)
+        stats[:, 3] = window.max(axis=0)
+        stats[:, 4] = np.abs(window - mean).mean(axis=0)
+        stats[:, 5] = self.sumsq / n
+
+        spectrum = np.abs(self.dft @ window)  # (size // 2, 3)
+        p = spectrum / spectrum.sum(axis=0)
+        freq = self._features[18:].reshape(3, 2)
+        freq[:, 0] = np.argmax(spectrum, axis=0)
+        freq[:, 1] = -np.sum(p * np.log2(p + 1e-10), axis=0)
+        return self._features
+
+
+def reference_features(window):
+    """The original per-window feature extraction, kept for comparison."""
+    from scipy.fft import fft
+
+    window = np.array(window)
+    features = []
+    for i in range(3):
+        axis_data = window[:, i]
+        features += [
+            np.mean(axis_data),
+            np.std(axis_data),
+            np.min(axis_data),
+            np.max(axis_data),
+            np.mean(np.abs(axis_data - np.mean(axis_data))),
+            np.sum(axis_data ** 2) / len(axis_data)
+        ]
+    for i in range(3):
+        fft_vals = np.abs(fft(window[:, i]))[:len(window) // 2]
+        freq_max = np.argmax(fft_vals)
+        spectral_entropy = -np.sum((fft_vals / np.sum(fft_vals)) * np.log2(fft_vals / np.sum(fft_vals) + 1e-10))
+        features.append(freq_max)
+        features.append(spectral_entropy)
+    return np.array(features)
+
+
+if __name__ == "__main__":
+    # Compare against the original extraction on a synthetic accelerometer trace and time both
+    rng = np.random.default_rng(0)
+    trace = np.cumsum(rng.integers(-400, 400, size=(2000, 3)), axis=0) + [6000, 7000, -5000]
+    trace = np.clip(trace, -32768, 32767)
+
+    engine = GestureFeatureWindow(size=10)
+    worst = 0.0
+    for i, sample in enumerate(trace):
+        engine.push(sample)
+        if engine.full:
+            got = engine.features()
+            expected = reference_features(trace[i - 9:i + 1])
+            worst = max(worst, float(np.max(np.abs(got - expected) / np.maximum(np.abs(expected), 1.0))))
+    print(f"Max relative difference vs reference: {worst:.2e}")
+
+    start = time.perf_counter()
+    for sample in trace:
+        engine.push(sample)
+        engine.features()
+    incremental = (time.perf_counter() - start) / len(trace)
+    start = time.perf_counter()
+    for i in range(9, len(trace)):
+        reference_features(trace[i - 9:i + 1])
+    reference = (time.perf_counter() - start) / (len(trace) - 9)
+    print(f"Per-sample cost: incremental {incremental * 1e6:.1f} us, reference {reference * 1e6:.1f} us")
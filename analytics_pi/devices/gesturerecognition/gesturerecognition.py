@@ -56,6 +56,7 @@ def extract_features(window):
 
 # Collect Data for Multiple Gestures
 all_data = []
+raw_data = []  # raw samples per recording, used by model selection to try other window sizes
 window_size = 10  # 10 samples per window (~0.5s if sampling at 20Hz)
 
 while True:
@@ -67,10 +68,12 @@ while True:
 
     data_window = []
     start_time = time.time()
+    recording_id = int(start_time * 1000)
     
     while time.time() - start_time < 10:  # Record for 10 seconds
         acc_x, acc_y, acc_z = read_accelerometer()
         data_window.append([acc_x, acc_y, acc_z])
+        raw_data.append([recording_id, acc_x, acc_y, acc_z, gesture_name])
         
         if len(data_window) == window_size:
             features = extract_features(data_window)
@@ -107,3 +110,14 @@ with open(csv_filename, "a", newline="") as file:
     writer.writerows(all_data)
 
 print(f"New features appended to {csv_filename}")
+
+# Raw samples, so other window sizes can be evaluated later (randomforest.py --search)
+raw_filename = os.path.join(script_dir, "gestures_raw.csv")
+raw_exists = os.path.exists(raw_filename)
+with open(raw_filename, "a", newline="") as file:
+    writer = csv.writer(file)
+    if not raw_exists:
+        writer.writerow(["recording", "x", "y", "z", "gesture"])
+    writer.writerows(raw_data)
+
+print(f"Raw samples appended to {raw_filename}")
@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from flat_forest import export_forest, FlatForest
+from gesture_features import FEATURE_NAMES, GestureFeatureWindow
+
+FEATURES_CSV = "gestures_dataset.csv"
+RAW_CSV = "gestures_raw.csv"          # written by gesturerecognition.py
+REPORT_FILE = "model_selection.json"
+DEFAULT_WINDOW = 10                   # window size the features CSV was recorded with
+LATENCY_SAMPLES = 200                 # single-window predictions timed per candidate
+
+
+def windowed_features(raw, window_size):
+    """Feature rows for every full sliding window within each raw recording (as gesturerecognition.py emits them)."""
+    rows, labels = [], []
+    for _, recording in raw.groupby("recording", sort=False):
+        engine = GestureFeatureWindow(size=window_size)
+        samples = recording[["x", "y", "z"]].to_numpy()
+        for sample in samples:
+            engine.push(sample)
+            if engine.full:
+                rows.append(engine.features().copy())
+        labels += [recording["gesture"].iloc[0]] * max(0, len(samples) - window_size + 1)
+    return pd.DataFrame(rows, columns=FEATURE_NAMES), pd.Series(labels, name="gesture")
+
+
+def load_features(window_size=DEFAULT_WINDOW):
+    """(X, y) for one window size: the recorded features CSV for the default window, raw traces otherwise."""
+    if window_size == DEFAULT_WINDOW and os.path.isfile(FEATURES_CSV):
+        df = pd.read_csv(FEATURES_CSV)
+        return df.iloc[:, :-1], df.iloc[:, -1]
+    if not os.path.isfile(RAW_CSV):
+        raise FileNotFoundError(f"{RAW_CSV} is needed for window size {window_size}; record with gesturerecognition.py")
+    return windowed_features(pd.read_csv(RAW_CSV), window_size)
+
+
+def fit_candidate(X_train, y_train, X_test, y_test, n_estimators, max_depth):
+    model = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=1)
+    model.fit(X_train, y_train)
+    return model, model.score(X_test, y_test)
+
+
+def measure_candidate(model, scaler, X_test, window_size):
+    """Median single-window latency of the runtime (flat) evaluator and the serialized sizes."""
+    buffer = io.BytesIO()
+    export_forest(model, scaler, FEATURE_NAMES, buffer, window_size=window_size)
+    flat_bytes = buffer.tell()
+    buffer.seek(0)
+    forest = FlatForest.load(buffer)
+
+    rows = X_test[:LATENCY_SAMPLES]
+    timings = []
+    for x in rows:
+        start = time.perf_counter()
+        forest.predict_one(x)
+        timings.append(time.perf_counter() - start)
+    return {
+        "latency_us": float(np.median(timings) * 1e6),
+        "latency_p95_us": float(np.percentile(timings, 95) * 1e6),
+        "flat_kb": flat_bytes / 1024,
+        "pickle_kb": len(pickle.dumps(model)) / 1024,
+        "max_depth_reached": int(forest.depth),
+    }
+
+
+def pareto_front(candidates):
+    """Indices of candidates no other candidate beats on accuracy, latency and size at once."""
+    front = []
+    for i, a in enumerate(candidates):
+        dominated = False
+        for j, b in enumerate(candidates):
+            if i == j:
+                continue
+            no_worse = (b["accuracy"] >= a["accuracy"] and b["latency_us"] <= a["latency_us"]
+                        and b["flat_kb"] <= a["flat_kb"])
+            better = (b["accuracy"] > a["accuracy"] or b["latency_us"] < a["latency_us"]
+                      or b["flat_kb"] < a["flat_kb"])
+            if no_worse and better:
+                dominated = True
+                break
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def run_search(n_estimators_grid, max_depth_grid, window_sizes, n_jobs=-1, latency_budget_us=None,
+               report_path=REPORT_FILE):
+    """
+    Grid search over forest size, depth and window size. Fits run in parallel
+    (n_jobs processes); latency is then measured one candidate at a time so the
+    timings are not skewed by the other fits. Writes the report to `report_path`.
+    """
+    datasets = {}
+    for window_size in window_sizes:
+        try:
+            X, y = load_features(window_size)
+        except FileNotFoundError as e:
+            print(f"[WARN] Skipping window size {window_size}: {e}")
+            continue
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        scaler = StandardScaler().fit(X_train)
+        datasets[window_size] = (scaler, scaler.transform(X_train), scaler.transform(X_test), y_train, y_test,
+                                 X_test.to_numpy())
+        print(f"Window {window_size}: {len(X)} windows")
+    if not datasets:
+        raise SystemExit("[ERROR] No training data for any window size")
+
+    grid = [(w, n, d) for w in datasets for n in n_estimators_grid for d in max_depth_grid]
+    print(f"Fitting {len(grid)} candidates...")
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(fit_candidate)(datasets[w][1], datasets[w][3], datasets[w][2], datasets[w][4], n, d)
+        for w, n, d in grid
+    )
+
+    candidates = []
+    for (window_size, n_estimators, max_depth), (model, accuracy) in zip(grid, fitted):
+        scaler, _, _, _, _, X_test_raw = datasets[window_size]
+        result = {"window_size": window_size, "n_estimators": n_estimators, "max_depth": max_depth,
+                  "accuracy": float(accuracy)}
+        result.update(measure_candidate(model, scaler, X_test_raw, window_size))
+        candidates.append(result)
+
+    for i in pareto_front(candidates):
+        candidates[i]["pareto"] = True
+    recommended = None
+    within_budget = [c for c in candidates if latency_budget_us is None or c["latency_us"] <= latency_budget_us]
+    if within_budget:
+        recommended = max(within_budget, key=lambda c: (c["accuracy"], -c["latency_us"]))
+        recommended["recommended"] = True
+
+    print_report(candidates)
+    if recommended is None:
+        print(f"[WARN] No candidate meets the {latency_budget_us} us latency budget")
+    else:
+        print(f"Recommended: --window {recommended['window_size']} --n-estimators {recommended['n_estimators']} "
+              f"--max-depth {recommended['max_depth'] or 0}")
+
+    with open(report_path, "w") as f:
+        json.dump({"latency_budget_us": latency_budget_us, "candidates": candidates}, f, indent=2)
+    print(f"Report saved to {report_path}")
+    return candidates
+
+
+def print_report(candidates):
+    print(f"\n{'':2}{'window':>6} {'trees':>5} {'depth':>5} {'acc':>6} {'p50 us':>8} {'p95 us':>8} "
+          f"{'flat KB':>8} {'pkl KB':>8}")
+    for c in sorted(candidates, key=lambda c: c["latency_us"]):
+        mark = ">" if c.get("recommended") else "*" if c.get("pareto") else " "
+        depth = "none" if c["max_depth"] is None else c["max_depth"]
+        print(f"{mark:2}{c['window_size']:>6} {c['n_estimators']:>5} {depth:>5} {c['accuracy']:>6.3f} "
+              f"{c['latency_us']:>8.1f} {c['latency_p95_us']:>8.1f} {c['flat_kb']:>8.1f} {c['pickle_kb']:>8.1f}")
+    print("* Pareto-optimal (accuracy / latency / size), > best accuracy within the latency budget\n")
@@ -1,17 +1,32 @@
-import pandas as pd
+import argparse
+import os
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 import joblib  # For saving/loading models
+from flat_forest import export_forest, FlatForest
+from model_selection import load_features, run_search, DEFAULT_WINDOW
 
-# Load dataset
-csv_filename = "gestures_dataset.csv"
-df = pd.read_csv(csv_filename)
+parser = argparse.ArgumentParser(description="Train the gesture RandomForest")
+parser.add_argument("--n-estimators", type=int, default=100)
+parser.add_argument("--max-depth", type=int, default=0, help="0 means unlimited")
+parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="samples per window (non-default needs gestures_raw.csv)")
+parser.add_argument("--search", action="store_true", help="grid search with latency/size measurement instead of training")
+parser.add_argument("--search-estimators", type=int, nargs="+", default=[10, 25, 50, 100])
+parser.add_argument("--search-depths", type=int, nargs="+", default=[6, 10, 14, 0], help="0 means unlimited")
+parser.add_argument("--search-windows", type=int, nargs="+", default=[6, 10, 16])
+parser.add_argument("--latency-budget", type=float, default=None, help="per-prediction budget in microseconds")
+parser.add_argument("--n-jobs", type=int, default=-1)
+args = parser.parse_args()
 
-# Separate features and labels
-X = df.iloc[:, :-1]  # All columns except last (features)
-y = df.iloc[:, -1]   # Last column (gesture label)
+if args.search:
+    run_search(args.search_estimators, [d or None for d in args.search_depths], args.search_windows,
+               n_jobs=args.n_jobs, latency_budget_us=args.latency_budget)
+    raise SystemExit(0)
+
+# Load dataset: features CSV for the default window, rebuilt from raw traces otherwise
+X, y = load_features(args.window)
 
 # Train-test split (80% train, 20% test)
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
@@ -25,7 +40,7 @@ X_test = scaler.transform(X_test)
 
 
 # Train a model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
+model = RandomForestClassifier(n_estimators=args.n_estimators, max_depth=args.max_depth or None, random_state=42)
 model.fit(X_train, y_train)
 
 # Save model, scaler, and feature names
@@ -33,6 +48,18 @@ joblib.dump(model, "gesture_model.pkl")
 joblib.dump(scaler, "scaler.pkl")
 joblib.dump(feature_names, "feature_names.pkl")  # Save feature names
 
+# Flat-array copy of the forest (scaler folded in) used by gesture.py at runtime
+export_forest(model, scaler, feature_names, "gesture_forest.npz", window_size=args.window)
+
 # Evaluate accuracy
 accuracy = model.score(X_test, y_test)
 print(f"Model Accuracy: {accuracy:.2f}")
+
+# Parity check: the flat evaluator on raw features must agree with sklearn on the whole dataset
+flat = FlatForest.load("gesture_forest.npz")
+expected = model.predict(scaler.transform(X))
+mismatches = int(np.sum(flat.predict(X.to_numpy()) != expected))
+print(f"Flat forest parity: {len(X) - mismatches}/{len(X)} predictions match sklearn")
+if mismatches:
+    os.remove("gesture_forest.npz")
+    raise SystemExit("[ERROR] Flat forest export disagrees with sklearn; not using gesture_forest.npz")
@@ -0,0 +1,174 @@
+import json
+import threading
+import time
+from collections import namedtuple, OrderedDict
+from datetime import datetime
+
+from .mqtt_config import MQTT_ALERT_TOPIC, MQTT_FACE_ALERT_TOPIC, MQTT_OBJECT_ALERT_TOPIC, \
+    MQTT_GESTURE_ALERT_TOPIC, MQTT_VOICE_ALERT_TOPIC
+from .mqtt_publisher import get_publisher
+
+# dedupe_window: seconds a repeat of the same event (key, or message without one) on a topic is suppressed
+# rate_per_min / burst: token bucket per (topic, key)
+AlertPolicy = namedtuple("AlertPolicy", ["dedupe_window", "rate_per_min", "burst"])
+
+DEFAULT_POLICY = AlertPolicy(dedupe_window=10, rate_per_min=6, burst=3)
+ALERT_POLICIES = {
+    MQTT_FACE_ALERT_TOPIC: AlertPolicy(dedupe_window=30, rate_per_min=2, burst=1),    # was alert_interval
+    MQTT_OBJECT_ALERT_TOPIC: AlertPolicy(dedupe_window=10, rate_per_min=6, burst=3),
+    MQTT_GESTURE_ALERT_TOPIC: AlertPolicy(dedupe_window=10, rate_per_min=6, burst=1),  # was GESTURE_COOLDOWN
+    MQTT_VOICE_ALERT_TOPIC: AlertPolicy(dedupe_window=30, rate_per_min=4, burst=2),
+    MQTT_ALERT_TOPIC: DEFAULT_POLICY,
+}
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst, now):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def allow(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class AlertEngine:
+    """
+    Single funnel for alerts from every detector.
+
+    Sources call report() with raw events as often as they see them. The key
+    identifies the event (a person, a tracked object; the message itself if no
+    key is given). An event is suppressed if the same key went out on its topic
+    within the topic's dedupe window, or if its (topic, key) token bucket is empty. Accepted events
+    are held until the next tick and each topic then gets one MQTT message: a
+    single event keeps the original {"timestamp", "message"} payload, a burst is
+    coalesced into one message whose "message" summarises the events and whose
+    "events" lists them.
+    """
+
+    def __init__(self, publisher, tick=1.0, policies=None, max_keys=1024):
+        self.publisher = publisher
+        self.tick = tick
+        self.policies = dict(ALERT_POLICIES if policies is None else policies)
+        self.max_keys = max_keys
+        self.reported = 0
+        self.deduped = 0
+        self.rate_limited = 0
+        self.sent_messages = 0
+        self.sent_events = 0
+        self._buckets = OrderedDict()    # (topic, key) -> TokenBucket, least recently used first
+        self._last_sent = OrderedDict()  # (topic, key) -> time it was last accepted
+        self._pending = OrderedDict()    # topic -> [(timestamp, message)]
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick + 1.0)
+        self.flush()
+
+    def report(self, topic, message, key=None, now=None):
+        """Record a raw event. Returns True if it will be published, False if suppressed."""
+        now = time.time() if now is None else now
+        policy = self.policies.get(topic, DEFAULT_POLICY)
+        key = message if key is None else key
+        with self._lock:
+            self.reported += 1
+            dedupe_key = (topic, key)
+            last = self._last_sent.get(dedupe_key)
+            if last is not None and now - last < policy.dedupe_window:
+                self.deduped += 1
+                return False
+
+            bucket_key = (topic, key)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = TokenBucket(policy.rate_per_min / 60.0, policy.burst, now)
+                self._buckets[bucket_key] = bucket
+            self._buckets.move_to_end(bucket_key)
+            if not bucket.allow(now):
+                self.rate_limited += 1
+                return False
+
+            self._last_sent[dedupe_key] = now
+            self._last_sent.move_to_end(dedupe_key)
+            self._pending.setdefault(topic, []).append((now, message))
+            self._trim(self._buckets)
+            self._trim(self._last_sent)
+        return True
+
+    def _trim(self, table):
+        while len(table) > self.max_keys:
+            table.popitem(last=False)
+
+    def flush(self):
+        """Publish one message per topic for everything accepted since the last flush."""
+        with self._lock:
+            pending, self._pending = self._pending, OrderedDict()
+        for topic, events in pending.items():
+            try:
+                self.publisher.publish(topic, self._payload(events))
+                self.sent_messages += 1
+                self.sent_events += len(events)
+            except Exception as e:
+                print(f"[ERROR] Failed to publish alerts on {topic}:", e)
+
+    @staticmethod
+    def _payload(events):
+        if len(events) == 1:
+            timestamp, message = events[0]
+            return json.dumps({
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "message": message
+            })
+        counts = OrderedDict()
+        for _, message in events:
+            counts[message] = counts.get(message, 0) + 1
+        summary = "; ".join(m if n == 1 else f"{m} (x{n})" for m, n in counts.items())
+        return json.dumps({
+            "timestamp": datetime.fromtimestamp(events[-1][0]).isoformat(),
+            "message": summary,
+            "count": len(events),
+            "events": [{"timestamp": datetime.fromtimestamp(t).isoformat(), "message": m} for t, m in events],
+        })
+
+    def stats(self):
+        return {
+            "reported": self.reported,
+            "deduped": self.deduped,
+            "rate_limited": self.rate_limited,
+            "sent_messages": self.sent_messages,
+            "sent_events": self.sent_events,
+        }
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.tick)
+            self.flush()
+
+
+# Shared instance for the whole process, created on first use
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_alert_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AlertEngine(get_publisher()).start()
+        return _engine
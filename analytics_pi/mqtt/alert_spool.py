@@ -0,0 +1,203 @@
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+# File header: magic, version, base, head, tail (little endian). Offsets are logical
+# byte positions that only ever grow; `base` is the logical offset stored at the
+# first byte after the header, so compaction can move records without changing
+# the offsets callers hold.
+SPOOL_MAGIC = b"ASP1"
+SPOOL_VERSION = 1
+SPOOL_HEADER = struct.Struct("<4sIQQQ")
+HEADER_SIZE = 64
+# Record: body length, crc32(body); body = topic, NUL, payload
+RECORD_HEADER = struct.Struct("<II")
+
+
+class AlertSpool:
+    """
+    Append-only, memory-mapped log of outgoing alerts with a fixed size cap.
+
+    append() copies a record into the mapping and returns immediately; a flusher
+    thread msyncs dirty data every `flush_interval` seconds (or sooner once
+    `flush_batch` records are waiting), so alert producers never wait on the
+    disk. The sender reads records in order with read_next() and ack()s them once
+    the broker has them; unacknowledged records survive restarts and are replayed
+    from the oldest after rewind(). When the file is full, the live records are
+    compacted to the front; if that is not enough the oldest are dropped until
+    the backlog is down to `low_water` of the capacity, so during a long outage
+    the compaction (a move of the whole backlog) runs once per quarter of the
+    file rather than on every append.
+    """
+
+    def __init__(self, path, capacity=4 * 1024 * 1024, flush_interval=1.0, flush_batch=32, low_water=0.75):
+        self.path = path
+        self.low_water = low_water
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.appended = 0
+        self.dropped = 0    # oldest records discarded to stay within the cap
+        self.rejected = 0   # records larger than the whole spool
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._flush_event = threading.Event()
+
+        exists = os.path.isfile(path) and os.path.getsize(path) > HEADER_SIZE
+        if not exists:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "wb") as f:
+                f.truncate(capacity)
+        self._file = open(path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = len(self._mm)
+
+        magic, version, base, head, tail = SPOOL_HEADER.unpack_from(self._mm, 0)
+        if magic != SPOOL_MAGIC or version != SPOOL_VERSION or not base <= head <= tail:
+            base = head = tail = 0
+        self.base, self.head, self.tail = base, head, tail
+        self._recover()
+        self.cursor = self.head  # next record to hand to the sender
+
+        self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, name="alert-spool-flush", daemon=True)
+        self._thread.start()
+
+    def _phys(self, offset):
+        return HEADER_SIZE + offset - self.base
+
+    def _write_header(self):
+        SPOOL_HEADER.pack_into(self._mm, 0, SPOOL_MAGIC, SPOOL_VERSION, self.base, self.head, self.tail)
+
+    def _record_at(self, offset):
+        """(topic, payload, end offset) of the record at `offset`, or None if it is torn or corrupt."""
+        if offset + RECORD_HEADER.size > self.tail:
+            return None
+        length, crc = RECORD_HEADER.unpack_from(self._mm, self._phys(offset))
+        start = self._phys(offset) + RECORD_HEADER.size
+        end = offset + RECORD_HEADER.size + length
+        if end > self.tail:
+            return None
+        body = self._mm[start:start + length]
+        if zlib.crc32(body) != crc:
+            return None
+        topic, _, payload = body.partition(b"\0")
+        return topic.decode("utf-8"), payload, end
+
+    def _recover(self):
+        """Drop a torn or corrupt tail left by a crash between writing a record and syncing it."""
+        offset = self.head
+        count = 0
+        while offset < self.tail:
+            record = self._record_at(offset)
+            if record is None:
+                print(f"[WARN] Alert spool truncated at a damaged record ({self.tail - offset} bytes lost)")
+                self.tail = offset
+                break
+            offset = record[2]
+            count += 1
+        self._write_header()
+        if count:
+            print(f"[INFO] Alert spool holds {count} unsent alert(s) from a previous run")
+
+    def append(self, topic, payload):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        body = topic.encode("utf-8") + b"\0" + (payload or b"")
+        size = RECORD_HEADER.size + len(body)
+        if size > self.capacity - HEADER_SIZE:
+            self.rejected += 1
+            return False
+        with self._lock:
+            if self._phys(self.tail) + size > self.capacity:
+                self._make_room(size)
+            position = self._phys(self.tail)
+            RECORD_HEADER.pack_into(self._mm, position, len(body), zlib.crc32(body))
+            self._mm[position + RECORD_HEADER.size:position + size] = body
+            self.tail += size
+            self._write_header()
+            self.appended += 1
+            self._dirty += 1
+            if self._dirty >= self.flush_batch:
+                self._flush_event.set()
+        return True
+
+    def _make_room(self, size):
+        # If the live records plus the new one do not fit, drop the oldest down to the low-water mark
+        usable = self.capacity - HEADER_SIZE
+        if self.tail - self.head + size > usable:
+            target = min(usable - size, int(usable * self.low_water))
+            while self.tail - self.head > target:
+                record = self._record_at(self.head)
+                self.head = self.tail if record is None else record[2]
+                self.dropped += 1
+        # Compact: move the live records to the front of the file
+        self._mm.move(HEADER_SIZE, self._phys(self.head), self.tail - self.head)
+        self.base = self.head
+        self.cursor = max(self.cursor, self.head)
+        self._write_header()
+
+    def has_unsent(self):
+        return self.cursor < self.tail
+
+    def backlog_bytes(self):
+        return self.tail - self.head
+
+    def read_next(self):
+        """(topic, payload, end offset) of the next unsent record, or None."""
+        with self._lock:
+            if self.cursor >= self.tail:
+                return None
+            record = self._record_at(self.cursor)
+            if record is None:  # cannot happen after _recover(); skip the rest rather than loop
+                self.cursor = self.tail
+                return None
+            self.cursor = record[2]
+            return record
+
+    def ack(self, end):
+        """Everything before logical offset `end` has reached the broker."""
+        with self._lock:
+            if end > self.head:
+                self.head = min(end, self.tail)
+                self._write_header()
+                self._dirty += 1
+
+    def rewind(self):
+        """Resend from the oldest unacknowledged record (after a reconnect)."""
+        with self._lock:
+            self.cursor = self.head
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = 0
+        # msync outside the lock so appends carry on while the disk catches up
+        self._mm.flush()
+
+    def _flush_loop(self):
+        while self._running:
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                print("[ERROR] Alert spool flush failed:", e)
+
+    def close(self):
+        self._running = False
+        self._flush_event.set()
+        self._thread.join(timeout=1.0)
+        self.flush()
+        self._mm.close()
+        self._file.close()
+
+    def stats(self):
+        return {
+            "backlog_bytes": self.backlog_bytes(),
+            "appended": self.appended,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,112 @@
+import base64
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from .mqtt_live_feed import publish_feed, publish_feed_binary
+from .mqtt_publisher import QueuedMessage
+from telemetry.metrics import metrics
+
+
+class FeedPublisher:
+    """
+    Single long-lived worker that resizes, JPEG-encodes and publishes live frames.
+
+    Frames are handed over with submit() through a small bounded queue; when the
+    worker falls behind, the oldest pending frame is dropped so the dashboard
+    always gets the most recent picture. mode="binary" publishes raw JPEG bytes
+    with a compact header on MQTT_FEED_BINARY_TOPIC, mode="json" keeps the
+    original base64/JSON payload on MQTT_FEED_TOPIC for older dashboards.
+    """
+
+    def __init__(self, client, mode="binary", size=(320, 240), quality=70, max_pending=2):
+        if mode not in ("binary", "json"):
+            raise ValueError(f"Unknown feed mode: {mode}")
+        self.client = client
+        self.mode = mode
+        self.size = size
+        self.quality = quality
+        self.published = 0
+        self.dropped = 0
+        self.latency = 0.0  # smoothed submit -> written-to-socket time, seconds
+        # (MQTTMessageInfo, submit time) not yet handed to the socket; bounded so a dead
+        # connection cannot grow it forever
+        self._in_flight = deque(maxlen=100)
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="feed-publisher", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, seq=0, timestamp=None):
+        """Queue a frame for publishing without blocking the caller."""
+        now = time.time()
+        item = (frame, seq, now if timestamp is None else timestamp, now)
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                    metrics.count("feed_dropped")
+                except queue.Empty:
+                    pass
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def outbound_depth(self):
+        """Frames waiting in our queue plus frames the MQTT client has not written out yet."""
+        return self._queue.qsize() + len(self._in_flight)
+
+    def _reap_in_flight(self):
+        now = time.time()
+        while self._in_flight:
+            info, submitted = self._in_flight[0]
+            # Through MqttPublisher a frame may also be dropped from its queue, which finishes it too
+            if isinstance(info, QueuedMessage):
+                if not info.is_done():
+                    break
+            elif info is not None and not info.is_published():
+                break
+            self._in_flight.popleft()
+            self.latency = 0.8 * self.latency + 0.2 * (now - submitted)
+
+    def stop(self):
+        self._running = False
+        self._queue.put(None)
+
+    def _run(self):
+        encode_params = [int(cv2.IMWRITE_JPEG_QUALITY), 0]
+        while self._running:
+            try:
+                item = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                self._reap_in_flight()
+                continue
+            if item is None:
+                break
+            frame, seq, timestamp, submitted = item
+            try:
+                if self.size is not None and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+                    frame = cv2.resize(frame, self.size)
+                encode_params[1] = int(self.quality)
+                with metrics.timed("jpeg_encode"):
+                    ok, buffer = cv2.imencode('.jpg', frame, encode_params)
+                if not ok:
+                    continue
+                height, width = frame.shape[:2]
+                with metrics.timed("publish"):
+                    if self.mode == "binary":
+                        info = publish_feed_binary(self.client, buffer.tobytes(), seq, width, height, timestamp)
+                    else:
+                        info = publish_feed(self.client, base64.b64encode(buffer).decode('utf-8'))
+                self._in_flight.append((info, submitted))
+                self._reap_in_flight()
+                self.published += 1
+            except Exception as e:
+                print("[ERROR] Failed to publish live feed frame:", e)
@@ -1,14 +1,23 @@
+import os
 import paho.mqtt.client as mqtt
 
 # Configuration constants
 MQTT_BROKER = "dashboard-pi.local"  # Use your Dashboard Pi's hostname (or IP)
 MQTT_PORT = 1883
 MQTT_FEED_TOPIC = "live_feed"
+MQTT_FEED_BINARY_TOPIC = "live_feed/jpeg"  # raw JPEG + FEED_HEADER, see mqtt_live_feed
 MQTT_ALERT_TOPIC = "alerts"
 MQTT_FACE_ALERT_TOPIC = "alerts/face"
 MQTT_OBJECT_ALERT_TOPIC = "alerts/object"
 MQTT_GESTURE_ALERT_TOPIC = "alerts/gesture"
 MQTT_VOICE_ALERT_TOPIC = "alerts/voice"
+MQTT_METRICS_TOPIC = "metrics/analytics"
+MQTT_PROFILE_CONTROL_TOPIC = "control/profile"        # {"duration": s, "interval_ms": ms, "include_stacks": bool}
+MQTT_PROFILE_RESULT_TOPIC = "control/profile/result"
+
+# Durable alert spool (see alert_spool.py), kept next to analytics_main.py
+ALERT_SPOOL_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alert_spool.bin")
+ALERT_SPOOL_BYTES = 4 * 1024 * 1024
 
 def connect_mqtt():
     client = mqtt.Client()
@@ -7,4 +7,4 @@ def publish_gesture_alert(client, gesture_name):
         "timestamp": datetime.now().isoformat(),
         "message": gesture_name
     })
-    client.publish(MQTT_GESTURE_ALERT_TOPIC, payload)
+    return client.publish(MQTT_GESTURE_ALERT_TOPIC, payload)
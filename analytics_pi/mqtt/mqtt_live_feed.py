@@ -1,17 +1,29 @@
 import json
+import struct
+import time
 from datetime import datetime
-from .mqtt_config import MQTT_FEED_TOPIC, MQTT_ALERT_TOPIC
+from .mqtt_config import MQTT_FEED_TOPIC, MQTT_FEED_BINARY_TOPIC, MQTT_ALERT_TOPIC
+
+# Binary feed header (little endian): magic, sequence number, capture timestamp
+# (unix seconds), width, height. The JPEG bytes follow immediately after it.
+FEED_MAGIC = b"LFJ1"
+FEED_HEADER = struct.Struct("<4sIdHH")
 
 def publish_feed(client, image_base64):
     payload = json.dumps({
         "timestamp": datetime.now().isoformat(),
         "image": image_base64
     })
-    client.publish(MQTT_FEED_TOPIC, payload)
+    return client.publish(MQTT_FEED_TOPIC, payload)
+
+def publish_feed_binary(client, jpeg_bytes, seq, width, height, timestamp=None):
+    header = FEED_HEADER.pack(FEED_MAGIC, seq & 0xFFFFFFFF, time.time() if timestamp is None else timestamp,
+                              width, height)
+    return client.publish(MQTT_FEED_BINARY_TOPIC, header + jpeg_bytes)
 
 def publish_alert(client, message, topic=MQTT_ALERT_TOPIC):
     payload = json.dumps({
         "timestamp": datetime.now().isoformat(),
         "message": message
     })
-    client.publish(topic, payload)
+    return client.publish(topic, payload)
@@ -0,0 +1,295 @@
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from .alert_spool import AlertSpool
+from .mqtt_config import MQTT_BROKER, MQTT_PORT, ALERT_SPOOL_FILE, ALERT_SPOOL_BYTES
+
+# Lower number = sent first, evicted last
+PRIORITY_ALERT = 0
+PRIORITY_NORMAL = 1  # metrics, status, anything not listed below
+PRIORITY_FEED = 2
+
+# Topic prefix -> priority; first match wins
+TOPIC_PRIORITIES = [
+    ("alerts", PRIORITY_ALERT),
+    ("live_feed", PRIORITY_FEED),
+]
+
+# Default QoS per priority; alerts must arrive, a lost feed frame is replaced by the next one
+PRIORITY_QOS = {
+    PRIORITY_ALERT: 1,
+    PRIORITY_NORMAL: 0,
+    PRIORITY_FEED: 0,
+}
+
+
+def topic_priority(topic):
+    for prefix, priority in TOPIC_PRIORITIES:
+        if topic == prefix or topic.startswith(prefix + "/"):
+            return priority
+    return PRIORITY_NORMAL
+
+
+class QueuedMessage:
+    """Handle returned by MqttPublisher.publish(); mirrors MQTTMessageInfo.is_published()."""
+
+    __slots__ = ("topic", "payload", "qos", "retain", "priority", "enqueued", "info", "dropped", "spool_end",
+                 "generation")
+
+    def __init__(self, topic, payload, qos, retain, priority):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.priority = priority
+        self.enqueued = time.time()
+        self.info = None      # MQTTMessageInfo once handed to paho
+        self.dropped = False  # evicted from the queue or rejected by the client
+        self.spool_end = None  # spool offset to acknowledge once published (spooled alerts only)
+        self.generation = 0    # connection the message was sent on
+
+    def is_published(self):
+        return self.info is not None and self.info.is_published()
+
+    def is_done(self):
+        return self.dropped or self.is_published()
+
+
+class MqttPublisher:
+    """
+    The process's single MQTT connection and outbound queue.
+
+    publish() never blocks: messages go into a bounded queue with one FIFO per
+    priority (alerts, normal, feed). When the queue is full the oldest message of
+    the lowest queued priority is evicted (never one more important than the new
+    message; if everything queued is more important, the new message is dropped).
+    A sender thread hands messages to paho in priority order while fewer than
+    `max_in_flight` are unacknowledged and the client is connected, so a slow or
+    absent broker backs up into this bounded queue instead of paho's unbounded one.
+    publish(topic, payload, qos=None) matches client.publish, so the existing
+    publish_* helpers accept a publisher in place of a client.
+
+    With a `spool` (AlertSpool), alerts bypass the in-memory queue: they are
+    appended to the on-disk spool, sent from it ahead of everything else, and
+    acknowledged in it once published, so they survive broker outages and
+    restarts. After every (re)connect the unacknowledged ones are replayed in order.
+    """
+
+    def __init__(self, broker=MQTT_BROKER, port=MQTT_PORT, max_queue=200, max_in_flight=20, topic_qos=None,
+                 keepalive=60, spool=None):
+        self.broker = broker
+        self.port = port
+        self.keepalive = keepalive
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.topic_qos = dict(topic_qos or {})
+        self.spool = spool
+        self.connected = False
+
+        # Counters, per priority
+        self.enqueued = {p: 0 for p in PRIORITY_QOS}
+        self.published = {p: 0 for p in PRIORITY_QOS}
+        self.dropped = {p: 0 for p in PRIORITY_QOS}
+        self.latency = {p: 0.0 for p in PRIORITY_QOS}  # smoothed enqueue -> published time, seconds
+
+        self._queues = {p: deque() for p in sorted(PRIORITY_QOS)}
+        self._queued = 0
+        self._in_flight = deque()
+        self._subscriptions = {}  # topic -> (qos, callback)
+        self._generation = 0      # bumped on every connect
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+        self.client = mqtt.Client()
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_publish = self._on_publish
+        self.client.reconnect_delay_set(min_delay=1, max_delay=30)
+
+    def start(self):
+        self._running = True
+        self.client.connect_async(self.broker, self.port, keepalive=self.keepalive)
+        self.client.loop_start()
+        self._thread = threading.Thread(target=self._run, name="mqtt-publisher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Flush what can be sent within `timeout`, then disconnect."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while (self._has_pending() or self._in_flight) and self.connected and time.time() < deadline:
+                self._cond.wait(0.05)
+                self._reap_in_flight()
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.client.disconnect()
+        self.client.loop_stop()
+        if self.spool is not None:
+            self.spool.close()
+
+    def subscribe(self, topic, callback, qos=0):
+        """Subscribe now (if connected) and again after every reconnect."""
+        self._subscriptions[topic] = (qos, callback)
+        self.client.message_callback_add(topic, callback)
+        if self.connected:
+            self.client.subscribe(topic, qos)
+
+    def publish(self, topic, payload=None, qos=None, retain=False, priority=None):
+        priority = topic_priority(topic) if priority is None else priority
+        if qos is None:
+            qos = self.topic_qos.get(topic, PRIORITY_QOS[priority])
+        message = QueuedMessage(topic, payload, qos, retain, priority)
+        if self.spool is not None and priority == PRIORITY_ALERT:
+            spooled = self.spool.append(topic, payload)
+            with self._cond:
+                self.enqueued[priority] += 1
+                if not spooled:
+                    message.dropped = True
+                    self.dropped[priority] += 1
+                self._cond.notify()
+            return message
+        with self._cond:
+            self.enqueued[priority] += 1
+            if self._queued >= self.max_queue and not self._evict(priority):
+                message.dropped = True
+                self.dropped[priority] += 1
+                return message
+            self._queues[priority].append(message)
+            self._queued += 1
+            self._cond.notify()
+        return message
+
+    def queue_depth(self):
+        return self._queued
+
+    def stats(self):
+        with self._cond:
+            return {
+                "connected": self.connected,
+                "queued": self._queued,
+                "in_flight": len(self._in_flight),
+                "enqueued": dict(self.enqueued),
+                "published": dict(self.published),
+                "dropped": dict(self.dropped),
+                "latency_ms": {p: round(v * 1000, 1) for p, v in self.latency.items()},
+                "spool": self.spool.stats() if self.spool is not None else None,
+            }
+
+    def _evict(self, priority):
+        """Drop the oldest message of the least important non-empty queue not above `priority`."""
+        for p in sorted(self._queues, reverse=True):
+            if p < priority:
+                break
+            if self._queues[p]:
+                victim = self._queues[p].popleft()
+                victim.dropped = True
+                self._queued -= 1
+                self.dropped[p] += 1
+                return True
+        return False
+
+    def _has_pending(self):
+        return self._queued > 0 or (self.spool is not None and self.spool.has_unsent())
+
+    def _next_message(self):
+        if self.spool is not None:
+            record = self.spool.read_next()
+            if record is not None:
+                topic, payload, end = record
+                message = QueuedMessage(topic, payload, self.topic_qos.get(topic, PRIORITY_QOS[PRIORITY_ALERT]),
+                                        False, PRIORITY_ALERT)
+                message.spool_end = end
+                return message
+        for q in self._queues.values():
+            if q:
+                self._queued -= 1
+                return q.popleft()
+        return None
+
+    def _reap_in_flight(self):
+        now = time.time()
+        while self._in_flight and self._in_flight[0].is_published():
+            message = self._in_flight.popleft()
+            if message.spool_end is not None and message.generation == self._generation:
+                self.spool.ack(message.spool_end)
+            self.published[message.priority] += 1
+            self.latency[message.priority] = 0.8 * self.latency[message.priority] + 0.2 * (now - message.enqueued)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._reap_in_flight()
+                while self._running and (not self._has_pending() or not self.connected
+                                         or len(self._in_flight) >= self.max_in_flight):
+                    self._cond.wait(0.05)
+                    self._reap_in_flight()
+                if not self._running:
+                    return
+                message = self._next_message()
+                if message is None:
+                    continue
+                message.generation = self._generation
+            try:
+                message.info = self.client.publish(message.topic, message.payload, qos=message.qos,
+                                                   retain=message.retain)
+            except Exception as e:
+                print(f"[ERROR] MQTT publish to {message.topic} failed: {e}")
+                message.info = None
+            with self._cond:
+                if message.info is None or message.info.rc != mqtt.MQTT_ERR_SUCCESS:
+                    if message.spool_end is not None:
+                        # Still in the spool: resend from the oldest unacknowledged alert after a pause
+                        self.spool.rewind()
+                        self._cond.wait(0.5)
+                        continue
+                    message.dropped = True
+                    self.dropped[message.priority] += 1
+                else:
+                    self._in_flight.append(message)
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            print(f"[ERROR] MQTT connection refused (rc={rc})")
+            return
+        print(f"[INFO] MQTT connected to {self.broker}:{self.port}")
+        for topic, (qos, _) in self._subscriptions.items():
+            client.subscribe(topic, qos)
+        with self._cond:
+            # Messages sent on the previous connection are either resent by paho or lost;
+            # spooled alerts are replayed from the oldest unacknowledged one instead
+            self._generation += 1
+            self._in_flight.clear()
+            if self.spool is not None:
+                self.spool.rewind()
+            self.connected = True
+            self._cond.notify_all()
+
+    def _on_disconnect(self, client, userdata, rc):
+        with self._cond:
+            self.connected = False
+        if rc != 0:
+            print(f"[WARN] MQTT disconnected unexpectedly (rc={rc}), reconnecting...")
+
+    def _on_publish(self, client, userdata, mid):
+        with self._cond:
+            self._cond.notify_all()
+
+
+# Shared instance for the whole process, created on first use
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = MqttPublisher(spool=AlertSpool(ALERT_SPOOL_FILE, capacity=ALERT_SPOOL_BYTES)).start()
+        return _publisher
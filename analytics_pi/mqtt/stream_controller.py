@@ -0,0 +1,75 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class AdaptiveStreamController:
+    """
+    Decides which rendered frames are worth sending on the live feed.
+
+    should_publish() skips frames that are too soon for the current frame rate
+    or whose 32x24 grayscale thumbnail barely differs from the last published
+    one (a keyframe is still sent every `keyframe_interval` seconds).
+    update() is fed the publisher's measured latency and outbound queue depth
+    and backs the frame rate and JPEG quality off multiplicatively when the
+    link is congested, recovering them slowly once it drains.
+    """
+
+    THUMB_SIZE = (32, 24)
+
+    def __init__(self, min_fps=1.0, max_fps=10.0, min_quality=35, max_quality=80,
+                 motion_threshold=3.0, keyframe_interval=5.0, latency_target=0.2,
+                 max_outbound=1, adjust_interval=1.0):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.motion_threshold = motion_threshold
+        self.keyframe_interval = keyframe_interval
+        self.latency_target = latency_target
+        self.max_outbound = max_outbound
+        self.adjust_interval = adjust_interval
+
+        self.fps = max_fps
+        self.quality = max_quality
+        self.skipped_static = 0
+        self.skipped_rate = 0
+        self.last_motion = 0.0
+        self._last_thumb = None
+        self._last_publish = float("-inf")
+        self._last_adjust = float("-inf")
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.THUMB_SIZE, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def should_publish(self, frame, now=None):
+        now = time.time() if now is None else now
+        if now - self._last_publish < 1.0 / self.fps:
+            self.skipped_rate += 1
+            return False
+
+        thumb = self._thumbnail(frame)
+        if self._last_thumb is not None:
+            self.last_motion = float(np.mean(np.abs(thumb - self._last_thumb)))
+            if self.last_motion < self.motion_threshold and now - self._last_publish < self.keyframe_interval:
+                self.skipped_static += 1
+                return False
+
+        self._last_thumb = thumb
+        self._last_publish = now
+        return True
+
+    def update(self, latency, outbound_depth, now=None):
+        now = time.time() if now is None else now
+        if now - self._last_adjust < self.adjust_interval:
+            return
+        self._last_adjust = now
+
+        if latency > self.latency_target or outbound_depth > self.max_outbound:
+            self.fps = max(self.min_fps, self.fps * 0.7)
+            self.quality = max(self.min_quality, self.quality - 10)
+        else:
+            self.fps = min(self.max_fps, self.fps + 0.5)
+            self.quality = min(self.max_quality, self.quality + 2)
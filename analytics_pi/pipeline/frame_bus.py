@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+# seq: monotonic sequence number (starts at 1), timestamp: capture time (time.time()),
+# dropped: frames published since the consumer's last_seq that it never saw
+FramePacket = namedtuple("FramePacket", ["seq", "timestamp", "frame", "dropped"])
+
+
+class FrameBus:
+    """
+    Small ring of preallocated frame buffers shared between one producer (the
+    camera thread) and any number of consumers.
+
+    The producer fills the buffer returned by next_buffer() (e.g. with
+    cap.read(buffer)) and then calls commit(). Consumers call wait_newer() with
+    the last sequence number they processed and block until a newer frame is
+    available, so the same frame is never analysed twice.
+    """
+
+    def __init__(self, shape, dtype=np.uint8, slots=4):
+        if slots < 2:
+            raise ValueError("FrameBus needs at least 2 slots")
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.slots = slots
+        self._buffers = [np.empty(self.shape, dtype=self.dtype) for _ in range(slots)]
+        self._timestamps = [0.0] * slots
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def next_buffer(self):
+        """Buffer the producer should write the next frame into (not yet visible to consumers)."""
+        return self._buffers[(self._seq + 1) % self.slots]
+
+    def commit(self, timestamp=None):
+        """Publish the frame written into next_buffer()."""
+        with self._cond:
+            self._seq += 1
+            self._timestamps[self._seq % self.slots] = time.time() if timestamp is None else timestamp
+            self._cond.notify_all()
+        return self._seq
+
+    def publish(self, frame, timestamp=None):
+        """Copy an externally allocated frame into the ring and publish it."""
+        buffer = self.next_buffer()
+        if frame.shape != self.shape:
+            raise ValueError(f"Frame shape {frame.shape} does not match bus shape {self.shape}")
+        np.copyto(buffer, frame)
+        return self.commit(timestamp)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _packet(self, last_seq, copy):
+        seq = self._seq
+        slot = seq % self.slots
+        frame = self._buffers[slot].copy() if copy else self._buffers[slot]
+        dropped = max(0, seq - last_seq - 1) if last_seq > 0 else 0
+        return FramePacket(seq, self._timestamps[slot], frame, dropped)
+
+    def latest(self, copy=True):
+        """Most recent frame, or None if nothing has been published yet."""
+        with self._cond:
+            if self._seq == 0:
+                return None
+            return self._packet(self._seq, copy)
+
+    def wait_newer(self, last_seq, timeout=None, copy=True):
+        """
+        Block until a frame newer than last_seq is published.
+
+        Returns a FramePacket, or None on timeout / when the bus is closed.
+        With copy=False the returned frame is a view into the ring and is only
+        valid until the producer has written another (slots - 1) frames.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq or self._closed, timeout):
+                return None
+            if self._seq <= last_seq:
+                return None
+            return self._packet(last_seq, copy)
@@ -0,0 +1,108 @@
+import threading
+import time
+from collections import namedtuple
+
+from telemetry.metrics import metrics
+
+# Latest output of a stage together with the frame it was computed from
+StageResult = namedtuple("StageResult", ["value", "seq", "timestamp", "duration"])
+
+
+class PipelineStage:
+    """
+    Runs one analytic in its own worker thread at up to `rate_hz`.
+
+    Each pass takes the newest frame on the bus (latest-frame-wins: anything
+    published while the stage was busy is skipped), calls `fn(frame)` and keeps
+    the return value as the stage's latest result. `on_result`, if given, is
+    called from the worker thread with every new StageResult.
+    """
+
+    def __init__(self, name, fn, bus, rate_hz=None, on_result=None):
+        self.name = name
+        self.fn = fn
+        self.bus = bus
+        self.rate_hz = rate_hz
+        self.on_result = on_result
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._result = None
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"stage-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+
+    def latest(self):
+        with self._lock:
+            return self._result
+
+    def _run(self):
+        period = 1.0 / self.rate_hz if self.rate_hz else 0.0
+        last_seq = 0
+        while self._running:
+            started = time.monotonic()
+            packet = self.bus.wait_newer(last_seq, timeout=1.0)
+            if packet is None:
+                continue
+            # Only the newest frame is ever handed out, everything in between is dropped
+            self.dropped += packet.dropped
+            metrics.count(f"{self.name}_frames_skipped", packet.dropped)
+            last_seq = packet.seq
+
+            try:
+                t0 = time.monotonic()
+                value = self.fn(packet.frame)
+                result = StageResult(value, packet.seq, packet.timestamp, time.monotonic() - t0)
+                metrics.observe(f"stage_{self.name}", result.duration)
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] {self.name} stage exception: {e}")
+                continue
+
+            with self._lock:
+                self._result = result
+            self.processed += 1
+
+            if self.on_result is not None:
+                try:
+                    self.on_result(result)
+                except Exception as e:
+                    print(f"[ERROR] {self.name} stage callback exception: {e}")
+
+            remaining = period - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+
+class StagePipeline:
+    """Owns a set of independent-rate stages reading from the same frame bus."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.stages = {}
+
+    def add_stage(self, name, fn, rate_hz=None, on_result=None):
+        stage = PipelineStage(name, fn, self.bus, rate_hz=rate_hz, on_result=on_result)
+        self.stages[name] = stage
+        return stage
+
+    def start(self):
+        for stage in self.stages.values():
+            stage.start()
+
+    def stop(self):
+        for stage in self.stages.values():
+            stage.stop()
+
+    def latest(self):
+        """Latest StageResult of every stage, keyed by stage name (None until it has run once)."""
+        return {name: stage.latest() for name, stage in self.stages.items()}
@@ -0,0 +1,279 @@
+"""
+Offline replay benchmark for the vision and gesture pipelines.
+
+Needs no camera, I2C bus or broker: recorded video is replayed through
+fr.process_frame and od.detect_objects, and a recorded accelerometer trace
+(x, y, z columns, e.g. gestures_raw.csv from gesturerecognition.py) through the
+gesture feature window and classifier used by gesture.py. Reports throughput,
+per-stage latency (the same telemetry.metrics stages the live system publishes)
+and peak RSS per part, and stores everything as JSON so runs on different
+commits can be compared. Run it from this directory, like analytics_main.py.
+
+    python replay_benchmark.py --video clip.mp4 --accel devices/gesturerecognition/gestures_raw.csv
+    python replay_benchmark.py --video clip.mp4 --compare benchmark_results/replay_<commit>.json
+"""
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(CURRENT_DIR, "benchmark_results")
+DEFAULT_ACCEL_TRACE = os.path.join(CURRENT_DIR, "devices", "gesturerecognition", "gestures_raw.csv")
+REGRESSION_TOLERANCE = 0.10  # relative change reported as a regression by --compare
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=CURRENT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def read_frames(source, limit):
+    """Yields up to `limit` frames of a video file, timing each decode as the "decode" stage."""
+    import cv2
+    from telemetry.metrics import metrics
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise RuntimeError(f"Cannot open video {source}")
+    try:
+        for _ in range(limit):
+            with metrics.timed("decode"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+    finally:
+        cap.release()
+
+
+def load_accel_trace(path, synthetic_samples=2000):
+    """(N, 3) int16 samples from a CSV with x, y, z columns, or a seeded synthetic trace if `path` is missing."""
+    import numpy as np
+
+    if path and os.path.isfile(path):
+        with open(path, newline="") as f:
+            rows = [(int(float(r["x"])), int(float(r["y"])), int(float(r["z"]))) for r in csv.DictReader(f)]
+        return np.array(rows, dtype=np.int16), path
+
+    # Alternating still and moving stretches around 1 g, so both the stillness gate and the classifier run
+    rng = np.random.default_rng(0)
+    base = np.array([0, 0, 16384], dtype=np.float64)
+    noise = rng.normal(0, 5, size=(synthetic_samples, 3))
+    moving = (np.arange(synthetic_samples) // 40) % 2 == 1
+    noise[moving] += rng.normal(0, 4000, size=(int(moving.sum()), 3))
+    return np.clip(base + noise, -32768, 32767).astype(np.int16), "synthetic"
+
+
+def bench_video(source, limit, warmup, cv_scaler, face_tracking, skip_faces, skip_objects):
+    from telemetry.metrics import metrics
+
+    fr = od = None
+    if not skip_faces:
+        from devices.camera_feed import facial_recognition as fr
+        fr.load_face_data()
+    if not skip_objects:
+        from devices.camera_feed import object_detection as od
+        od.stationary_threshold = math.inf  # no evidence snapshots from replayed footage
+
+    def process(frame):
+        if fr is not None:
+            with metrics.timed("face_frame"):
+                if face_tracking:
+                    fr.detect_faces(frame, cv_scaler=cv_scaler, tracking=True)
+                else:
+                    fr.process_frame(frame, cv_scaler=cv_scaler)
+        if od is not None:
+            with metrics.timed("object_frame"):
+                od.detect_objects(frame)
+
+    frames = 0
+    busy = 0.0
+    for i, frame in enumerate(read_frames(source, limit + warmup)):
+        if i == warmup:
+            metrics.snapshot(reset=True)
+        start = time.perf_counter()
+        process(frame)
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            metrics.observe("frame", elapsed)
+            frames += 1
+            busy += elapsed
+
+    if frames == 0:
+        raise RuntimeError(f"No frames left in {source} after {warmup} warmup frames")
+    snapshot = metrics.snapshot(reset=True)
+    return {
+        "source": os.path.basename(source),
+        "frames": frames,
+        "fps": round(frames / busy, 2),
+        "stages": snapshot["stages"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def bench_gesture(trace_path, loops):
+    from telemetry.metrics import metrics
+    from devices.gesturerecognition import gesture
+    from devices.gesturerecognition.gesture_features import GestureFeatureWindow
+
+    samples, source = load_accel_trace(trace_path)
+    window = GestureFeatureWindow(size=gesture.GESTURE_WINDOW_SIZE)
+    metrics.snapshot(reset=True)
+
+    classified = 0
+    start = time.perf_counter()
+    for _ in range(loops):
+        window.reset()
+        for sample in samples:
+            # Same steps as gesture.process_sample, minus alerting
+            with metrics.timed("gesture_window"):
+                window.push(sample)
+                active = window.full and not window.is_still(gesture.VARIANCE_THRESHOLD)
+            if not active:
+                continue
+            with metrics.timed("gesture_features"):
+                features = window.features()
+            with metrics.timed("gesture_classify"):
+                gesture.predict_gesture(features)
+            classified += 1
+    elapsed = time.perf_counter() - start
+
+    snapshot = metrics.snapshot(reset=True)
+    total = len(samples) * loops
+    return {
+        "source": os.path.basename(source),
+        "classifier": "flat_forest" if gesture.forest is not None else "sklearn",
+        "samples": total,
+        "windows_classified": classified,
+        "samples_per_s": round(total / elapsed, 1),
+        "stages": snapshot["stages"],
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(fn, *args):
+    """Runs one part in a fresh interpreter so its peak RSS is not inflated by the other parts."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args).result()
+
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Prints the change of every shared metric against `baseline`; returns the regressions."""
+    print(f"\n[INFO] Comparing against commit {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')})")
+    print(f"{'metric':<44}{'baseline':>12}{'current':>12}{'change':>10}")
+    regressions = []
+
+    def row(name, old, new, higher_is_better=False):
+        if not old or new is None:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = "  REGRESSION" if worse > tolerance else ""
+        if flag:
+            regressions.append(name)
+        print(f"{name:<44}{old:>12.3f}{new:>12.3f}{change:>+9.1%}{flag}")
+
+    for part, current in results["parts"].items():
+        previous = baseline.get("parts", {}).get(part)
+        if not previous or "error" in current or "error" in previous:
+            continue
+        workload = ("source", "frames", "samples", "classifier")
+        if any(previous.get(k) != current.get(k) for k in workload if k in current):
+            print(f"[WARN] {part}: input differs from the baseline, numbers are not directly comparable")
+        for key in ("fps", "samples_per_s"):
+            if key in current:
+                row(f"{part}.{key}", previous.get(key), current[key], higher_is_better=True)
+        row(f"{part}.peak_rss_mb", previous.get("peak_rss_mb"), current["peak_rss_mb"])
+        for stage, summary in current["stages"].items():
+            old = previous.get("stages", {}).get(stage)
+            if old is None:
+                continue
+            for key in ("mean_ms", "p95_ms"):
+                row(f"{part}.{stage}.{key}", old[key], summary[key])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded video and accelerometer data through the pipelines")
+    parser.add_argument("--video", help="video file to replay through face recognition and object detection")
+    parser.add_argument("--limit", type=int, default=300, help="maximum number of measured frames")
+    parser.add_argument("--warmup", type=int, default=5, help="frames processed before measuring")
+    parser.add_argument("--cv-scaler", type=int, default=3, help="face recognition downscale factor")
+    parser.add_argument("--face-tracking", action="store_true",
+                        help="use detect_faces(tracking=True) as the live face stage does")
+    parser.add_argument("--skip-faces", action="store_true")
+    parser.add_argument("--skip-objects", action="store_true")
+    parser.add_argument("--accel", default=DEFAULT_ACCEL_TRACE,
+                        help="CSV with x, y, z columns; a synthetic trace is used if it does not exist")
+    parser.add_argument("--accel-loops", type=int, default=20, help="times the trace is replayed")
+    parser.add_argument("--skip-gesture", action="store_true")
+    parser.add_argument("--output", help="results file (default benchmark_results/replay_<commit>.json)")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "parts": {},
+    }
+
+    parts = []
+    if args.video:
+        parts.append(("video", bench_video, (args.video, args.limit, args.warmup, args.cv_scaler,
+                                             args.face_tracking, args.skip_faces, args.skip_objects)))
+    if not args.skip_gesture:
+        parts.append(("gesture", bench_gesture, (args.accel, args.accel_loops)))
+    if not parts:
+        raise SystemExit("[ERROR] Nothing to run: pass --video and/or drop --skip-gesture")
+
+    for name, fn, fn_args in parts:
+        print(f"[INFO] Running {name} replay...")
+        try:
+            results["parts"][name] = run_isolated(fn, *fn_args)
+        except Exception as e:
+            print(f"[ERROR] {name} replay failed: {e}")
+            results["parts"][name] = {"error": str(e)}
+            continue
+        part = results["parts"][name]
+        rate = f"{part['fps']:.1f} fps" if "fps" in part else f"{part['samples_per_s']:.0f} samples/s"
+        print(f"[INFO] {name}: {rate}, peak RSS {part['peak_rss_mb']:.1f} MB")
+        for stage, summary in part["stages"].items():
+            print(f"    {stage:<20} mean {summary['mean_ms']:>9.3f} ms  p95 {summary['p95_ms']:>9.3f} ms"
+                  f"  ({summary['count']} calls)")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"replay_{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n[WARN] {len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}")
+            raise SystemExit(1)
+        print("\n[INFO] No regressions")
@@ -0,0 +1,184 @@
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds: 10 us to ~100 s, 8 buckets per doubling (~9% wide)
+BUCKET_BOUNDS = [1e-5 * 2 ** (i / 8) for i in range(int(8 * math.log2(1e7)) + 1)]
+
+
+class Histogram:
+    """
+    Fixed log-bucket latency histogram (seconds).
+
+    observe() is a bisect and two increments without a lock; concurrent updates
+    from several threads can very occasionally lose a count, which is acceptable
+    for monitoring. Percentiles are reported as the upper bound of the bucket
+    the rank falls in, i.e. within ~9% of the true value.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKET_BOUNDS[i], self.max) if i < len(BUCKET_BOUNDS) else self.max
+        return self.max
+
+    def summary(self, elapsed):
+        return {
+            "count": self.count,
+            "rate": round(self.count / elapsed, 2) if elapsed > 0 else 0.0,
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class MetricsRegistry:
+    """Named latency histograms and counters, summarised per reporting interval."""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()  # only taken to create a metric and to swap intervals
+        self._interval_start = time.monotonic()
+
+    def observe(self, name, seconds):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram())
+        histogram.observe(seconds)
+
+    def count(self, name, n=1):
+        self._counters[name] = self._counters.get(name, 0) + n
+
+    @contextmanager
+    def timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self, reset=True):
+        """Summary of everything observed since the last reset; starts a new interval when `reset`."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._interval_start
+            histograms, counters = self._histograms, self._counters
+            if reset:
+                self._histograms, self._counters = {}, {}
+                self._interval_start = now
+        return {
+            "interval_s": round(elapsed, 3),
+            "stages": {name: h.summary(elapsed) for name, h in sorted(histograms.items())},
+            "counters": dict(sorted(counters.items())),
+        }
+
+
+# Process-wide registry; instrument code with metrics.timed("stage") / metrics.count("event")
+metrics = MetricsRegistry()
+
+
+class MetricsReporter:
+    """
+    Publishes a metrics snapshot every `interval` seconds on `topic` and, with
+    `http_port`, serves the latest one as JSON at http://<pi>:<port>/metrics.
+    Extra sections (e.g. MQTT publisher stats) come from add_source() callables.
+    """
+
+    def __init__(self, publisher, topic, interval=10.0, registry=metrics, http_port=None):
+        self.publisher = publisher
+        self.topic = topic
+        self.interval = interval
+        self.registry = registry
+        self.http_port = http_port
+        self.latest = {}
+        self._sources = {}
+        self._running = False
+        self._thread = None
+        self._server = None
+
+    def add_source(self, name, fn):
+        self._sources[name] = fn
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="metrics-reporter", daemon=True)
+        self._thread.start()
+        if self.http_port is not None:
+            self._start_http()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def report(self):
+        report = {"timestamp": time.time()}
+        report.update(self.registry.snapshot(reset=True))
+        for name, fn in self._sources.items():
+            try:
+                report[name] = fn()
+            except Exception as e:
+                report[name] = {"error": str(e)}
+        self.latest = report
+        self.publisher.publish(self.topic, json.dumps(report))
+        return report
+
+    def _run(self):
+        while self._running:
+            time.sleep(self.interval)
+            try:
+                self.report()
+            except Exception as e:
+                print("[ERROR] Failed to publish metrics:", e)
+
+    def _start_http(self):
+        reporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = json.dumps(reporter.latest, indent=2).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("0.0.0.0", self.http_port), Handler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[INFO] Metrics available at http://0.0.0.0:{self.http_port}/metrics")
@@ -0,0 +1,146 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_DURATION = 120.0        # seconds; longer requests are clamped
+MAX_INLINE_STACKS = 256 * 1024  # bytes of collapsed stacks that may be sent back over MQTT
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for every thread in the process.
+
+    Nothing runs while idle. run() starts one sampler thread that reads
+    sys._current_frames() every `interval` seconds for `duration` seconds and
+    counts each thread's stack (outermost frame first, prefixed with the thread
+    name), which is exactly the collapsed format flamegraph.pl / speedscope read.
+    Threads blocked in I/O or waiting on the GIL show up too, so the output shows
+    where time goes, not just CPU.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self, duration=10.0, interval=0.005, on_done=None):
+        """
+        Profile in the background; `on_done((summary, collapsed_stacks))` is called at the end.
+        Returns False if a profile is already running.
+        """
+        with self._lock:
+            if self.running:
+                return False
+            duration = min(max(float(duration), 0.1), MAX_DURATION)
+            self._thread = threading.Thread(target=self._sample, args=(duration, interval, on_done),
+                                            name="profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def _sample(self, duration, interval, on_done):
+        own = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + duration
+        while time.monotonic() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                stacks[";".join(reversed(stack))] += 1
+            samples += 1
+            time.sleep(interval)
+        result = self._summarize(stacks, samples, time.monotonic() - started)
+        if on_done is not None:
+            try:
+                on_done(result)
+            except Exception as e:
+                print("[ERROR] Failed to deliver profile:", e)
+
+    def _summarize(self, stacks, samples, elapsed, top=25):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"profile_{time.strftime('%Y%m%d_%H%M%S')}.folded")
+        folded = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        with open(path, "w") as f:
+            f.write(folded)
+
+        threads = Counter()
+        own_time = Counter()   # samples where the function was the innermost frame
+        total_time = Counter()  # samples where the function was anywhere on the stack
+        for stack, count in stacks.items():
+            thread, *frames = stack.split(";")
+            threads[thread] += count
+            if frames:
+                own_time[frames[-1]] += count
+            for label in set(frames):
+                total_time[label] += count
+
+        total = sum(stacks.values()) or 1
+
+        def table(counter):
+            return [{"function": label, "samples": n, "percent": round(100.0 * n / total, 2)}
+                    for label, n in counter.most_common(top)]
+
+        result = {
+            "duration_s": round(elapsed, 2),
+            "samples": samples,
+            "threads": dict(threads.most_common()),
+            "top_self": table(own_time),
+            "top_total": table(total_time),
+            "file": path,
+        }
+        print(f"[INFO] Profile written to {path} ({samples} samples)")
+        return result, folded
+
+
+def handle_profile_request(profiler, publisher, result_topic, payload):
+    """
+    MQTT control handler: payload is JSON like {"duration": 10, "interval_ms": 5,
+    "include_stacks": false}. The summary (and, if asked for and small enough,
+    the collapsed stacks) is published on `result_topic` when sampling ends.
+    """
+    try:
+        request = json.loads(payload.decode() or "{}") if payload else {}
+    except ValueError:
+        request = payload  # not JSON (or not UTF-8): rejected below
+    if not isinstance(request, dict):
+        publisher.publish(result_topic, json.dumps({"error": f"invalid profile request: {request}"}))
+        return
+    include_stacks = bool(request.get("include_stacks", False))
+
+    def on_done(outcome):
+        summary, folded = outcome
+        if include_stacks and len(folded) <= MAX_INLINE_STACKS:
+            summary["stacks"] = folded
+        publisher.publish(result_topic, json.dumps(summary))
+
+    try:
+        duration = float(request.get("duration", 10.0))
+        interval = max(float(request.get("interval_ms", 5)), 1.0) / 1000.0
+        if not (math.isfinite(duration) and math.isfinite(interval)):
+            raise ValueError("non-finite value")
+    except (TypeError, ValueError):
+        publisher.publish(result_topic, json.dumps({"error": f"invalid profile request: {request}"}))
+        return
+    started = profiler.run(duration=duration, interval=interval, on_done=on_done)
+    if not started:
+        publisher.publish(result_topic, json.dumps({"error": "profiler already running"}))
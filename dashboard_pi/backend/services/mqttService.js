@@ -4,6 +4,26 @@ import { getLocalIP } from "../utils/networkUtils.js";
 const LOCAL_IP = getLocalIP();
 const MQTT_BROKER = `mqtt://${LOCAL_IP}`;
 const MQTT_FEED_TOPIC = "live_feed";
+const MQTT_FEED_BINARY_TOPIC = "live_feed/jpeg";
+
+// Binary feed header written by analytics_pi/mqtt/mqtt_live_feed.py (little endian):
+// magic "LFJ1" (4 bytes), seq uint32, timestamp float64 (unix seconds), width uint16, height uint16
+const FEED_MAGIC = "LFJ1";
+const FEED_HEADER_SIZE = 20;
+
+const parseBinaryFeed = (message) => {
+  if (message.length < FEED_HEADER_SIZE || message.toString("ascii", 0, 4) !== FEED_MAGIC) {
+    throw new Error("Invalid binary feed frame");
+  }
+  return {
+    seq: message.readUInt32LE(4),
+    timestamp: new Date(message.readDoubleLE(8) * 1000).toISOString(),
+    width: message.readUInt16LE(16),
+    height: message.readUInt16LE(18),
+    // The frontend still expects a base64 JPEG in "image"
+    image: message.subarray(FEED_HEADER_SIZE).toString("base64"),
+  };
+};
 
 // Initialize WebSocket instance
 let ioInstance;
@@ -18,11 +38,13 @@ const client = mqtt.connect(MQTT_BROKER);
 client.on("connect", () => {
   console.log(`? Connected to MQTT Broker at ${MQTT_BROKER}`);
 
-  // Subscribe to video feed
-  client.subscribe(MQTT_FEED_TOPIC, (err) => {
-    if (err) {
-      console.error("Error subscribing to live_feed:", err);
-    }
+  // Subscribe to video feed (legacy JSON/base64 and binary JPEG)
+  [MQTT_FEED_TOPIC, MQTT_FEED_BINARY_TOPIC].forEach((topic) => {
+    client.subscribe(topic, (err) => {
+      if (err) {
+        console.error(`Error subscribing to ${topic}:`, err);
+      }
+    });
   });
 
     // Subscribe to all alert topics
@@ -37,6 +59,17 @@ client.on("connect", () => {
 });
 
 client.on("message", (topic, message) => {
+  if (topic === MQTT_FEED_BINARY_TOPIC) {
+    try {
+      if (ioInstance) {
+        ioInstance.emit("live_feed", parseBinaryFeed(message));
+      }
+    } catch (err) {
+      console.error("Error parsing binary feed frame:", err);
+    }
+    return;
+  }
+
   try {
     const payload = JSON.parse(message.toString());
 